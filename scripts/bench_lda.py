@@ -0,0 +1,101 @@
+"""
+Benchmark: per-bank LDA modes (wall-clock + topic coherence)
+
+Replicates the sentiment results up to n_rows and compares
+- batch, sequential      (the original behaviour)
+- batch, parallel        (one process per bank)
+- online, parallel       (mini-batch variational Bayes)
+- online update          (fit on 90%, partial_fit the last 10%)
+
+Coherence is the mean UMass score of each bank's topics over its own
+reviews (closer to 0 is better).
+
+Usage:
+    python scripts/bench_lda.py [n_rows]
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from storage import read_dataset
+from theme_extraction import ThemeExtractor, top_topic_words
+
+
+def make_corpus(n_rows):
+    df = read_dataset("data/sentiment/sentiment_results.csv")
+    reps = -(-n_rows // len(df))
+    return pd.concat([df] * reps, ignore_index=True).iloc[:n_rows]
+
+
+def umass_coherence(bow_matrix, topic_word_ids):
+    """Mean UMass coherence: sum over ranked word pairs of log((D(wi, wj) + 1) / D(wj))"""
+    scores = []
+    for ids in topic_word_ids:
+        present = (bow_matrix[:, ids] > 0).astype(np.float64)
+        co_docs = (present.T @ present).toarray()
+        score = 0.0
+        for m in range(1, len(ids)):
+            for l in range(m):
+                score += np.log((co_docs[m, l] + 1) / max(co_docs[l, l], 1))
+        scores.append(score)
+    return float(np.mean(scores))
+
+
+def coherence(extractor, df, top_words=8):
+    per_bank = []
+    for bank, (count_vectorizer, lda) in extractor.models.items():
+        bow_matrix = count_vectorizer.transform(df.loc[df["bank_code"] == bank, "review_text"].tolist())
+        vocab = count_vectorizer.vocabulary_
+        features = count_vectorizer.get_feature_names_out()
+        topic_word_ids = [[vocab[w] for w in words] for words in top_topic_words(lda, features, top_words)]
+        per_bank.append(umass_coherence(bow_matrix.tocsc(), topic_word_ids))
+    return float(np.mean(per_bank))
+
+
+def run(df, n_jobs, learning_method, update_df=None):
+    extractor = ThemeExtractor(n_jobs=n_jobs, learning_method=learning_method)
+    extractor.df = df
+
+    start = time.perf_counter()
+    extractor.lda_topic_modeling()
+    elapsed = time.perf_counter() - start
+
+    if update_df is not None:
+        start = time.perf_counter()
+        extractor.update_lda(update_df)
+        elapsed = time.perf_counter() - start
+
+    return elapsed, coherence(extractor, df if update_df is None else pd.concat([df, update_df]))
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    df = make_corpus(n_rows)
+    cpus = os.cpu_count() or 1
+    split = int(len(df) * 0.9)
+
+    modes = [
+        ("batch, sequential", lambda: run(df, 1, "batch")),
+        (f"batch, {cpus} workers", lambda: run(df, cpus, "batch")),
+        (f"online, {cpus} workers", lambda: run(df, cpus, "online")),
+        ("online update (10%)", lambda: run(df.iloc[:split], 1, "online", df.iloc[split:])),
+    ]
+
+    results = [(name, *fn()) for name, fn in modes]
+
+    print("\n" + "=" * 60)
+    print(f"LDA MODES ({n_rows:,} reviews, {df['bank_code'].nunique()} banks, {cpus} CPUs)")
+    print("=" * 60)
+    baseline = results[0][1]
+    for name, elapsed, score in results:
+        print(f"{name:24s} {elapsed:8.2f}s  x{baseline / elapsed:5.1f}  UMass {score:7.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark: VADER scoring throughput vs number of worker processes
+
+Replicates the processed reviews up to n_rows and times score_texts
+with 1, 2, 4, ... up to os.cpu_count() workers.
+
+Usage:
+    python scripts/bench_sentiment.py [n_rows]
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import time
+
+import numpy as np
+
+from config import DATA_PATHS
+from sentiment_analysis import score_texts
+from storage import read_dataset
+
+
+def make_corpus(n_rows):
+    texts = read_dataset(DATA_PATHS["processed_reviews"], columns=["review_text"])["review_text"].astype(str).tolist()
+    reps = -(-n_rows // len(texts))
+    return (texts * reps)[:n_rows]
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    texts = make_corpus(n_rows)
+
+    cpus = os.cpu_count() or 1
+    worker_counts = sorted({1, *[2 ** i for i in range(1, 8) if 2 ** i <= cpus], cpus})
+
+    print(f"Scoring {n_rows:,} reviews on {cpus} CPUs")
+    print("\n" + "=" * 60)
+    print("VADER THROUGHPUT")
+    print("=" * 60)
+
+    baseline = None
+    reference = None
+    for n_jobs in worker_counts:
+        start = time.perf_counter()
+        scores = score_texts(texts, n_jobs=n_jobs)
+        elapsed = time.perf_counter() - start
+
+        baseline = baseline or elapsed
+        if reference is None:
+            reference = scores
+
+        print(f"{n_jobs:3d} workers: {elapsed:8.2f}s  {n_rows / elapsed:10,.0f} rows/s  "
+              f"x{baseline / elapsed:4.1f}  same={np.array_equal(scores, reference)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark: sentiment module start-up cost
+
+Each measurement runs in a fresh Python process and reports
+- import: time to import the scoring module
+- first score: time from there to the first polarity score
+
+"before" replays the old import path (nltk.download + analyzer built at
+import time); "after" imports sentiment_analysis, which defers both.
+
+Usage:
+    python scripts/bench_sentiment_startup.py [repeats]
+"""
+
+import os
+import sys
+import json
+import statistics
+import subprocess
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+BEFORE = """
+import time
+t0 = time.perf_counter()
+import nltk
+from nltk.sentiment import SentimentIntensityAnalyzer
+nltk.download('vader_lexicon', quiet=True)
+analyzer = SentimentIntensityAnalyzer()
+t1 = time.perf_counter()
+analyzer.polarity_scores("The app works well")
+t2 = time.perf_counter()
+print(t1 - t0, t2 - t1)
+"""
+
+AFTER = """
+import sys, time
+sys.path.insert(0, %r)
+t0 = time.perf_counter()
+import sentiment_analysis
+t1 = time.perf_counter()
+sentiment_analysis.get_vader_analyzer().polarity_scores("The app works well")
+t2 = time.perf_counter()
+print(t1 - t0, t2 - t1)
+""" % SRC_DIR
+
+
+def measure(code, repeats):
+    imports, firsts = [], []
+    for _ in range(repeats):
+        out = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        ).stdout.split()
+        imports.append(float(out[-2]))
+        firsts.append(float(out[-1]))
+    return statistics.median(imports), statistics.median(firsts)
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    results = {
+        "before": measure(BEFORE, repeats),
+        "after": measure(AFTER, repeats),
+    }
+
+    print("=" * 60)
+    print(f"SENTIMENT START-UP (median of {repeats} fresh processes)")
+    print("=" * 60)
+    for name, (imp, first) in results.items():
+        print(f"{name:7s} import: {imp * 1000:8.1f} ms   first score: {first * 1000:8.1f} ms   "
+              f"total: {(imp + first) * 1000:8.1f} ms")
+
+    print(json.dumps({k: {"import_s": v[0], "first_score_s": v[1]} for k, v in results.items()}))
+
+
+if __name__ == "__main__":
+    main()
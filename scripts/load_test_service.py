@@ -0,0 +1,102 @@
+"""
+Load test: review scoring service latency
+
+Sends POST /score requests from concurrent clients (one keep-alive
+connection each) to a running service and reports latency percentiles
+(p50 / p90 / p99) and throughput. Review texts come from the sentiment
+results when present, otherwise from a few built-in samples.
+
+Start the service first:
+    python src/service.py
+
+Usage:
+    python scripts/load_test_service.py [url] [requests] [concurrency]
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import json
+import time
+import http.client
+import statistics
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+SAMPLES = [
+    ("CBE", "The app keeps crashing when I try to transfer money"),
+    ("BOA", "Very slow to login, please fix the OTP problem"),
+    ("Dashen", "Excellent app, easy to use and fast"),
+    ("CBE", "Good"),
+    ("BOA", "Customer support never answers, worst banking app"),
+]
+
+
+def load_texts(limit=5000):
+    try:
+        from storage import read_dataset
+
+        df = read_dataset("data/sentiment/sentiment_results.csv", columns=["bank_code", "review_text"])
+        df = df.dropna().head(limit)
+        return list(zip(df["bank_code"].astype(str), df["review_text"].astype(str)))
+    except Exception:
+        return SAMPLES
+
+
+def client(url, payloads):
+    """One keep-alive connection; returns per-request latencies in seconds"""
+    parsed = urllib.parse.urlsplit(url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=30)
+    headers = {"Content-Type": "application/json"}
+    latencies = []
+    for body in payloads:
+        t0 = time.perf_counter()
+        conn.request("POST", "/score", body=body, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - t0)
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status} from {url}/score")
+    conn.close()
+    return latencies
+
+
+def main():
+    url = sys.argv[1] if len(sys.argv) > 1 else "http://127.0.0.1:8000"
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 16
+
+    texts = load_texts()
+    payloads = [
+        json.dumps({"bank_code": bank, "text": text})
+        for bank, text in (texts[i % len(texts)] for i in range(requests))
+    ]
+
+    # warm-up outside the measurement
+    client(url, payloads[:10])
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        chunks = [payloads[i::concurrency] for i in range(concurrency)]
+        latencies = [lat for result in pool.map(lambda c: client(url, c), chunks) for lat in result]
+    elapsed = time.perf_counter() - t0
+
+    ms = np.array(latencies) * 1000
+    p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+
+    print("=" * 60)
+    print(f"SCORING SERVICE: {requests} requests, {concurrency} clients, {url}")
+    print("=" * 60)
+    print(f"p50: {p50:8.2f} ms   p90: {p90:8.2f} ms   p99: {p99:8.2f} ms   "
+          f"mean: {statistics.fmean(ms):8.2f} ms")
+    print(f"throughput: {requests / elapsed:8.1f} req/s")
+
+    print(json.dumps({"requests": requests, "concurrency": concurrency, "p50_ms": p50,
+                      "p90_ms": p90, "p99_ms": p99, "throughput_rps": requests / elapsed}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Sentiment aggregate cube for reporting
+
+Scored reviews are aggregated once into a compact cube with one row per
+
+    bank_code x bank_name x day x rating x sentiment_label
+
+holding review_count and sentiment_score_sum. Every report table and
+chart in the task4 insights (bank aggregates, weekly trends, rating
+counts, label shares) is a rollup of this cube, a few thousand rows
+instead of every review.
+
+The cube is stored next to the sentiment results (data/analytics/,
+Parquet partitioned by bank and month, see storage.py). The sentiment
+stage rebuilds it on full runs and applies only the added / removed rows
+on delta runs. A stamp file next to it records a hash of the results the
+cube was built from; a delta is only applied to a cube whose stamp
+matches, otherwise the cube is rebuilt.
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from config import DATA_PATHS
+from storage import dataset_exists, dataset_location, partition_keys, read_dataset, write_dataset
+
+CUBE_KEYS = ["bank_code", "bank_name", "review_date", "rating", "sentiment_label"]
+CUBE_MEASURES = ["review_count", "sentiment_score_sum"]
+
+
+# -----------------------------------------------------------
+# BUILD / MAINTAIN
+# -----------------------------------------------------------
+def _cube_rows(reviews):
+    """The cube columns of each review, with the cube's dtypes"""
+    return pd.DataFrame({
+        "bank_code": reviews["bank_code"].astype(str).to_numpy(),
+        "bank_name": reviews["bank_name"].to_numpy(),
+        "review_date": pd.to_datetime(reviews["review_date"]).dt.normalize().to_numpy(),
+        "rating": reviews["rating"].to_numpy(),
+        "sentiment_label": reviews["sentiment_label"].to_numpy(),
+        "sentiment_score": reviews["sentiment_score"].to_numpy(),
+    })
+
+
+def build_cube(reviews):
+    """Aggregate scored reviews into the cube"""
+    cube = _cube_rows(reviews).groupby(CUBE_KEYS, sort=True)["sentiment_score"].agg(["size", "sum"])
+    cube.columns = CUBE_MEASURES
+    return cube.reset_index()
+
+
+def update_cube(cube, added=None, removed=None):
+    """
+    Cube after a delta: the cells of added reviews are incremented, those
+    of removed ones (including the old version of a changed review)
+    decremented. Cells that drop to zero reviews disappear.
+    """
+    parts = [cube]
+    if added is not None and len(added):
+        parts.append(build_cube(added))
+    if removed is not None and len(removed):
+        negated = build_cube(removed)
+        negated[CUBE_MEASURES] = -negated[CUBE_MEASURES]
+        parts.append(negated)
+
+    merged = pd.concat(parts, ignore_index=True)
+    merged["bank_code"] = merged["bank_code"].astype(str)
+    merged["review_date"] = pd.to_datetime(merged["review_date"])
+    merged = merged.groupby(CUBE_KEYS, sort=True)[CUBE_MEASURES].sum().reset_index()
+    return merged[merged["review_count"] > 0].reset_index(drop=True)
+
+
+def load_cube(path=None):
+    cube = read_dataset(path or DATA_PATHS["sentiment_cube"])
+    cube["bank_code"] = cube["bank_code"].astype(str)
+    cube["review_date"] = pd.to_datetime(cube["review_date"])
+    return cube[CUBE_KEYS + CUBE_MEASURES]
+
+
+def results_hash(reviews):
+    """
+    Order-independent hash of the reviews' cube columns: the sum of the row
+    hashes mod 2**64, so hash(after) = hash(before) + hash(added) - hash(removed).
+    """
+    if reviews is None or not len(reviews):
+        return 0
+    rows = _cube_rows(reviews).astype({"review_date": "datetime64[ns]", "rating": "float64"})
+    hashes = pd.util.hash_pandas_object(rows, index=False).to_numpy()
+    return int(hashes.sum(dtype=np.uint64))
+
+
+def _stamp_path(path):
+    return os.path.splitext(path)[0] + ".stamp.json"
+
+
+def read_stamp(path):
+    """results_hash of the reviews the stored cube was built from, None if unknown"""
+    try:
+        with open(_stamp_path(path)) as f:
+            return json.load(f)["results_hash"]
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+
+
+def write_stamp(path, value):
+    stamp_path = _stamp_path(path)
+    os.makedirs(os.path.dirname(stamp_path) or ".", exist_ok=True)
+    with open(stamp_path, "w") as f:
+        json.dump({"results_hash": value}, f)
+
+
+def refresh_cube(reviews=None, added=None, removed=None, path=None):
+    """
+    Bring the stored cube up to date: from a delta (added / removed rows)
+    when a cube exists, otherwise rebuilt from all reviews. Only the
+    bank/month partitions a delta touches are rewritten.
+
+    With reviews given, a delta is only applied when the cube's stamp
+    matches the reviews before the delta; any other cube (e.g. from a run
+    that died after writing the results but before updating the cube) is
+    rebuilt.
+    """
+    path = path or DATA_PATHS["sentiment_cube"]
+    stamp = read_stamp(path)
+    current = results_hash(reviews) if reviews is not None else None
+    delta = results_hash(added) - results_hash(removed)
+    cube = None
+
+    if (added is not None or removed is not None) and dataset_exists(path):
+        if current is None or stamp == (current - delta) % 2**64:
+            cube = update_cube(load_cube(path), added, removed)
+            partitions = set()
+            for rows in (added, removed):
+                if rows is not None and len(rows):
+                    partitions |= partition_keys(rows)
+        else:
+            print("Stored cube was not built from the current results, rebuilding it.")
+
+    if cube is None:
+        if reviews is None:
+            raise ValueError("no stored cube to update, pass all reviews to build one")
+        cube = build_cube(reviews)
+        partitions = None
+
+    write_dataset(cube, path, partitions=partitions)
+    if current is not None:
+        write_stamp(path, current)
+    elif stamp is not None:
+        write_stamp(path, (stamp + delta) % 2**64)
+    return cube
+
+
+# -----------------------------------------------------------
+# ROLLUPS
+# -----------------------------------------------------------
+def week_start(dates):
+    """Monday 00:00 of each date's week (same as to_period("W").start_time), vectorized"""
+    days = pd.to_datetime(pd.Series(dates)).dt.normalize()
+    return days - pd.to_timedelta(days.dt.weekday, unit="D")
+
+
+def rollup(cube, by, freq=None):
+    """
+    Sum the cube over every dimension not in `by`. With freq "W" or "M"
+    review_date is first truncated to the week / month start.
+    Adds avg_sentiment (sentiment_score_sum / review_count).
+    """
+    cube = cube.copy()
+    if freq == "W":
+        cube["review_date"] = week_start(cube["review_date"]).to_numpy()
+    elif freq == "M":
+        cube["review_date"] = cube["review_date"].dt.to_period("M").dt.start_time
+    elif freq is not None:
+        raise ValueError(f"Unknown freq {freq!r}, use 'W' or 'M'")
+
+    result = cube.groupby(list(by), sort=True)[CUBE_MEASURES].sum().reset_index()
+    result["avg_sentiment"] = result["sentiment_score_sum"] / result["review_count"]
+    return result
+
+
+def _weighted_median(values, counts):
+    """Median of values repeated counts times (rows = groups), like Series.median"""
+    cumulative = counts.cumsum(axis=1)
+    total = cumulative[:, -1:]
+    lower = (cumulative > (total - 1) // 2).argmax(axis=1)
+    upper = (cumulative > total // 2).argmax(axis=1)
+    return (values[lower] + values[upper]) / 2
+
+
+def bank_aggregates(cube):
+    """total_reviews, avg/median rating, avg sentiment and label shares per bank"""
+    by_bank = rollup(cube, ["bank_name"]).set_index("bank_name")
+    ratings = rollup(cube, ["bank_name", "rating"]).pivot(
+        index="bank_name", columns="rating", values="review_count"
+    ).fillna(0).reindex(by_bank.index)
+    labels = label_counts(cube).reindex(by_bank.index)
+
+    rating_values = ratings.columns.to_numpy(dtype=float)
+    rating_counts = ratings.to_numpy()
+    total = by_bank["review_count"]
+
+    agg = pd.DataFrame({
+        "total_reviews": total,
+        "avg_rating": (rating_counts * rating_values).sum(axis=1) / total,
+        "median_rating": _weighted_median(rating_values, rating_counts),
+        "avg_sentiment": by_bank["avg_sentiment"],
+        "positive_pct": labels.get("positive", 0) / total * 100,
+        "negative_pct": labels.get("negative", 0) / total * 100,
+    }, index=by_bank.index).reset_index()
+    return agg.sort_values("total_reviews", ascending=False)
+
+
+def weekly_sentiment(cube):
+    """Average sentiment score per bank and week (bank_name, week, sentiment_score)"""
+    trend = rollup(cube, ["bank_name", "review_date"], freq="W")
+    return trend.rename(columns={"review_date": "week", "avg_sentiment": "sentiment_score"})[
+        ["bank_name", "week", "sentiment_score"]
+    ]
+
+
+def rating_counts(cube):
+    """Reviews per bank and star rating (long format)"""
+    return rollup(cube, ["bank_name", "rating"])[["bank_name", "rating", "review_count"]]
+
+
+def label_counts(cube):
+    """Reviews per bank (rows) and sentiment label (columns)"""
+    return rollup(cube, ["bank_name", "sentiment_label"]).pivot(
+        index="bank_name", columns="sentiment_label", values="review_count"
+    ).fillna(0)
+
+
+def main():
+    reviews = read_dataset("data/sentiment/sentiment_results.csv",
+                           columns=["bank_code", "bank_name", "review_date", "rating",
+                                    "sentiment_label", "sentiment_score"])
+    cube = refresh_cube(reviews)
+    print(f"Cube: {len(cube)} cells from {len(reviews)} reviews "
+          f"→ {dataset_location(DATA_PATHS['sentiment_cube'])}")
+    print(bank_aggregates(cube).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
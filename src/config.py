@@ -1,58 +1,177 @@
-"""
-Configuration file for Customer Experience Analytics for Fintech Apps
-"""
-
-import os
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Google Play Store App IDs (Ethiopian banks)
-APP_IDS = {
-    "CBE": os.getenv("CBE_APP_ID", "com.combanketh.mobilebanking"),
-    "BOA": os.getenv("BOA_APP_ID", "com.boa.boaMobileBanking"),
-    "Dashen": os.getenv("DASHEN_APP_ID", "com.dashen.dashensuperapp"),
-}
-
-# Bank Names Mapping
-BANK_NAMES = {
-    "CBE": "Commercial Bank of Ethiopia",
-    "BOA": "Bank of Abyssinia",
-    "Dashen": "Dashen Bank"
-}
-
-# Scraping Configuration
-SCRAPING_CONFIG = {
-    "reviews_per_bank": int(os.getenv("REVIEWS_PER_BANK", 500)),
-    "max_retries": int(os.getenv("MAX_RETRIES", 3)),
-    "lang": "en",
-    "country": "et"    # Ethiopia
-}
-
-# File Paths
-DATA_PATHS = {
-    "raw": "data/raw",
-    "processed": "data/processed",
-    "raw_reviews": "data/raw/reviews_raw.csv",
-    "processed_reviews": "data/processed/reviews_processed.csv",
-    "sentiment_results": "data/processed/reviews_with_sentiment.csv",
-    "final_results": "data/processed/reviews_final.csv",
-}
-
-
-
-class Settings:
-
-    # PostgreSQL credentials
-    DB_HOST = os.getenv("DB_HOST")
-    DB_PORT = os.getenv("DB_PORT")
-    DB_NAME = os.getenv("DB_NAME")
-    DB_USER = os.getenv("DB_USER")
-    DB_PASSWORD = os.getenv("DB_PASSWORD")
-
-    # Data paths
-    PROCESSED_CSV = os.getenv("PROCESSED_CSV", "data/sentiment/sentiment_results.csv")
-
-settings = Settings()
-
+"""
+Configuration file for Customer Experience Analytics for Fintech Apps
+"""
+
+import os
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Google Play Store App IDs (Ethiopian banks)
+APP_IDS = {
+    "CBE": os.getenv("CBE_APP_ID", "com.combanketh.mobilebanking"),
+    "BOA": os.getenv("BOA_APP_ID", "com.boa.boaMobileBanking"),
+    "Dashen": os.getenv("DASHEN_APP_ID", "com.dashen.dashensuperapp"),
+}
+
+# Bank Names Mapping
+BANK_NAMES = {
+    "CBE": "Commercial Bank of Ethiopia",
+    "BOA": "Bank of Abyssinia",
+    "Dashen": "Dashen Bank"
+}
+
+# Scraping Configuration
+SCRAPING_CONFIG = {
+    "reviews_per_bank": int(os.getenv("REVIEWS_PER_BANK", 500)),
+    "max_retries": int(os.getenv("MAX_RETRIES", 3)),
+    "page_size": int(os.getenv("PAGE_SIZE", 200)),   # reviews per paginated request
+    "max_workers": int(os.getenv("SCRAPER_WORKERS", 8)),
+    "requests_per_second": float(os.getenv("SCRAPER_RPS", 2)),   # shared by all workers
+    "burst": int(os.getenv("SCRAPER_BURST", 4)),
+    "backoff_base": 1.0,    # seconds, doubled on every retry
+    "backoff_max": 30.0,
+    # full: one request per bank | paginated: resumable crawl |
+    # incremental: only reviews newer than the stored high-water mark
+    "mode": os.getenv("SCRAPE_MODE", "full"),
+    "output_format": os.getenv("RAW_FORMAT", "csv"),    # csv | jsonl | parquet
+    "chunk_size": int(os.getenv("SCRAPE_CHUNK_SIZE", 1000)),   # rows per disk write
+    "lang": "en",
+    "country": "et"    # Ethiopia
+}
+
+# Preprocessing Configuration
+PREPROCESSING_CONFIG = {
+    # rows per chunk for out-of-core processing, 0 = load everything at once
+    "chunksize": int(os.getenv("PREPROCESS_CHUNKSIZE", 0)),
+    # estimated Jaccard similarity (character 3-grams) for near duplicates
+    "near_dup_threshold": float(os.getenv("NEAR_DUP_THRESHOLD", 0.8)),
+    # reviews kept in the near-duplicate index (~520 bytes each), 0 = all
+    "near_dup_window": int(os.getenv("NEAR_DUP_WINDOW", 200_000)),
+}
+
+# Sentiment Scoring Configuration
+SENTIMENT_CONFIG = {
+    "n_jobs": int(os.getenv("SENTIMENT_WORKERS", os.cpu_count() or 1)),
+    "batch_size": int(os.getenv("SENTIMENT_BATCH_SIZE", 2000)),   # texts per worker task
+    "cache": os.getenv("SENTIMENT_CACHE", "1") == "1",
+    "cache_max_entries": int(os.getenv("SENTIMENT_CACHE_MAX_ENTRIES", 1_000_000)),
+    # local nltk data dir with sentiment/vader_lexicon.zip; empty = nltk defaults
+    "vader_lexicon_dir": os.getenv("VADER_LEXICON_DIR", ""),
+    "allow_download": os.getenv("VADER_ALLOW_DOWNLOAD", "0") == "1",
+    # score only reviews that are new or whose text changed since the last run
+    "delta": os.getenv("DELTA_MODE", "0") == "1",
+}
+
+# Theme Extraction Configuration
+THEME_CONFIG = {
+    "n_jobs": int(os.getenv("THEME_WORKERS", os.cpu_count() or 1)),   # banks fitted in parallel
+    # batch: full EM passes | online: mini-batch updates, can partial_fit new reviews later
+    "lda_learning_method": os.getenv("LDA_LEARNING_METHOD", "batch"),
+    "lda_batch_size": int(os.getenv("LDA_BATCH_SIZE", 128)),   # online mode only
+    "lda_max_iter": int(os.getenv("LDA_MAX_ITER", 10)),
+    # tag only new/changed reviews, update counts and fold them into the saved LDA models
+    "delta": os.getenv("DELTA_MODE", "0") == "1",
+}
+
+# Streaming sentiment monitor (see monitor.py)
+MONITOR_CONFIG = {
+    "enabled": os.getenv("SENTIMENT_MONITOR", "1") == "1",   # fed by every sentiment run
+    "alpha_fast": float(os.getenv("MONITOR_ALPHA_FAST", 0.1)),    # current level, ~10 reviews
+    "alpha_slow": float(os.getenv("MONITOR_ALPHA_SLOW", 0.01)),   # baseline, ~100 reviews
+    "warmup": int(os.getenv("MONITOR_WARMUP", 100)),   # reviews per bank before alerting
+    "min_std": 0.05,
+    "cusum_k": float(os.getenv("MONITOR_CUSUM_K", 0.5)),   # drift allowance, in std units
+    "cusum_h": float(os.getenv("MONITOR_CUSUM_H", 10.0)),   # alarm level
+    # limits in noise units of the fast-vs-baseline difference, see monitor.py
+    "negative_z": float(os.getenv("MONITOR_NEGATIVE_Z", 5.0)),
+    "rating_chi2": float(os.getenv("MONITOR_RATING_CHI2", 40.0)),
+    "min_rate": 0.01,   # floor for rates in the noise estimate
+}
+
+# Rule-based theme lexicon: group name -> label + keywords. Keywords match
+# whole words (plus plural/-ed/-ing endings), case-insensitively.
+THEME_LEXICON = {
+    "account_access": {
+        "label": "Account Access Issues",
+        "keywords": ["login", "password", "account", "access", "verification"],
+    },
+    "performance": {
+        "label": "Performance & Reliability",
+        "keywords": ["slow", "loading", "crash", "error", "fail", "not working"],
+    },
+    "user_experience": {
+        "label": "User Interface & Experience",
+        "keywords": ["ui", "interface", "design", "easy", "navigation"],
+    },
+    "customer_support": {
+        "label": "Customer Support",
+        "keywords": ["support", "service", "help", "call"],
+    },
+    "transactions": {
+        "label": "Transactions & Payments",
+        "keywords": ["transfer", "transaction", "payment", "balance"],
+    },
+}
+DEFAULT_THEME = "General Feedback"
+
+# Intermediate dataset storage (see storage.py)
+STORAGE_CONFIG = {
+    "format": os.getenv("STORAGE_FORMAT", "parquet"),   # parquet | csv
+    "compression": os.getenv("PARQUET_COMPRESSION", "zstd"),
+}
+
+# Pipeline runner (see pipeline.py)
+PIPELINE_CONFIG = {
+    "max_workers": int(os.getenv("PIPELINE_WORKERS", 2)),   # independent stages run at once
+}
+
+# Review scoring service (see service.py)
+SERVICE_CONFIG = {
+    "host": os.getenv("SERVICE_HOST", "127.0.0.1"),
+    "port": int(os.getenv("SERVICE_PORT", 8000)),
+    "max_batch": int(os.getenv("SERVICE_MAX_BATCH", 64)),       # reviews scored together
+    "max_wait_ms": float(os.getenv("SERVICE_MAX_WAIT_MS", 5)),  # wait for a batch to fill
+}
+
+# File Paths
+DATA_PATHS = {
+    "raw": "data/raw",
+    "processed": "data/processed",
+    "raw_reviews": "data/raw/reviews_raw.csv",
+    "scrape_checkpoints": "data/raw/checkpoints",
+    "raw_store": "data/raw/reviews",
+    "processed_reviews": "data/processed/reviews_processed.csv",
+    "review_tokens": "data/processed/reviews_processed.tokens.npz",    # see token_store.py
+    "sentiment_cache": "data/cache/sentiment_cache.sqlite",
+    "topic_models": "models/topics",    # versioned LDA artifacts, see topic_models.py
+    "pipeline_state": "data/pipeline_state.json",    # stage fingerprints, see pipeline.py
+    "sentiment_cube": "data/analytics/sentiment_cube.csv",    # report aggregates, see analytics.py
+    "monitor_state": "data/monitor/state.json",    # see monitor.py
+    "monitor_events": "data/monitor/events.jsonl",
+    "sentiment_results": "data/processed/reviews_with_sentiment.csv",
+    "final_results": "data/processed/reviews_final.csv",
+}
+
+
+
+class Settings:
+
+    # PostgreSQL credentials
+    DB_HOST = os.getenv("DB_HOST")
+    DB_PORT = os.getenv("DB_PORT")
+    DB_NAME = os.getenv("DB_NAME")
+    DB_USER = os.getenv("DB_USER")
+    DB_PASSWORD = os.getenv("DB_PASSWORD")
+
+    # Rows per COPY batch when loading reviews
+    LOAD_BATCH_SIZE = int(os.getenv("LOAD_BATCH_SIZE", 50000))
+    # insert: add new reviews only | sync: also update rows whose content changed
+    LOAD_MODE = os.getenv("LOAD_MODE", "insert")
+
+    # Data paths
+    PROCESSED_CSV = os.getenv("PROCESSED_CSV", "data/sentiment/sentiment_results.csv")
+
+settings = Settings()
+
@@ -1,48 +1,166 @@
-# src/db.py
-
-import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from urllib.parse import quote_plus
-from dotenv import load_dotenv
-
-# Load .env
-load_dotenv()
-
-# Read DB credentials from environment variables
-DB_HOST = os.getenv("DB_HOST")
-DB_PORT = os.getenv("DB_PORT")
-DB_NAME = os.getenv("DB_NAME")
-DB_USER = os.getenv("DB_USER")
-DB_PASSWORD = os.getenv("DB_PASSWORD")
-
-# Encode password (important if it contains special characters)
-encoded_password = quote_plus(DB_PASSWORD)
-
-# Build database URL
-DATABASE_URL = (
-    f"postgresql+psycopg2://{DB_USER}:{encoded_password}"
-    f"@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-)
-
-# Create engine
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,     # prevents "server closed the connection" errors
-)
-
-# Create session factory
-SessionLocal = sessionmaker(
-    autocommit=False,
-    autoflush=False,
-    bind=engine
-)
-
-# Optional helper
-def get_db():
-    """FastAPI-style dependency (optional for scripts)."""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# src/db.py
+
+import os
+import asyncio
+import threading
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.orm import sessionmaker
+from dotenv import load_dotenv
+
+# Load .env
+load_dotenv()
+
+# Read DB credentials from environment variables
+DB_HOST = os.getenv("DB_HOST")
+DB_PORT = os.getenv("DB_PORT")
+DB_NAME = os.getenv("DB_NAME")
+DB_USER = os.getenv("DB_USER")
+DB_PASSWORD = os.getenv("DB_PASSWORD")
+
+# Full SQLAlchemy URL, overrides the DB_* settings (e.g. sqlite:///data/test.db)
+DATABASE_URL_OVERRIDE = os.getenv("DATABASE_URL")
+
+# Connection pool settings (ignored for SQLite)
+POOL_CONFIG = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", 5)),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 10)),
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", 1800)),   # seconds
+    "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", 30)),     # seconds to wait for a connection
+}
+
+# Server-side statement timeout in milliseconds, 0 = no limit
+STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 0))
+
+# Async drivers for each sync backend
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+_lock = threading.Lock()
+_engine = None
+_session_factory = None
+_async_engine = None
+
+
+def get_database_url():
+    """Sync database URL; the password is only required at this point, not at import"""
+    if DATABASE_URL_OVERRIDE:
+        return make_url(DATABASE_URL_OVERRIDE)
+
+    if DB_PASSWORD is None:
+        raise RuntimeError("DB_PASSWORD is not set (set DB_* in .env or DATABASE_URL)")
+
+    # URL.create escapes special characters in the password
+    return URL.create(
+        "postgresql+psycopg2",
+        username=DB_USER,
+        password=DB_PASSWORD,
+        host=DB_HOST,
+        port=int(DB_PORT) if DB_PORT else None,
+        database=DB_NAME,
+    )
+
+
+def get_async_database_url():
+    url = get_database_url()
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+
+def _engine_options(url):
+    """Pool and timeout options for create_engine / create_async_engine"""
+    options = {"pool_pre_ping": True}   # prevents "server closed the connection" errors
+    backend = url.get_backend_name()
+    if backend == "sqlite":
+        return options
+
+    options.update(POOL_CONFIG)
+    if STATEMENT_TIMEOUT_MS and backend == "postgresql":
+        if url.get_driver_name() == "asyncpg":
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(STATEMENT_TIMEOUT_MS)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={STATEMENT_TIMEOUT_MS}"}
+    return options
+
+
+# -----------------------------------------------------------
+# Sync engine (created on first use)
+# -----------------------------------------------------------
+def get_engine():
+    global _engine, _session_factory
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                url = get_database_url()
+                engine = create_engine(url, **_engine_options(url))
+                _session_factory = sessionmaker(
+                    autocommit=False,
+                    autoflush=False,
+                    bind=engine
+                )
+                _engine = engine
+    return _engine
+
+
+def get_sessionmaker():
+    get_engine()
+    return _session_factory
+
+
+def __getattr__(name):
+    # keep `from db import engine, SessionLocal` working without connecting at import
+    if name == "engine":
+        return get_engine()
+    if name == "SessionLocal":
+        return get_sessionmaker()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Optional helper
+def get_db():
+    """FastAPI-style dependency (optional for scripts)."""
+    db = get_sessionmaker()()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# -----------------------------------------------------------
+# Async engine: concurrent queries over one connection pool
+# -----------------------------------------------------------
+def get_async_engine():
+    """
+    Async engine (asyncpg / aiosqlite). Its pooled connections belong to
+    the running event loop, call dispose_async_engine() before it closes.
+    """
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        with _lock:
+            if _async_engine is None:
+                url = get_async_database_url()
+                _async_engine = create_async_engine(url, **_engine_options(url))
+    return _async_engine
+
+
+async def dispose_async_engine():
+    global _async_engine
+    if _async_engine is not None:
+        engine, _async_engine = _async_engine, None
+        await engine.dispose()
+
+
+async def fetch_all(query, params=None):
+    """Run one query on a pooled connection and return its rows as dicts"""
+    async with get_async_engine().connect() as conn:
+        result = await conn.execute(text(query), params or {})
+        return [dict(row) for row in result.mappings().all()]
+
+
+async def run_queries(queries):
+    """Run {name: sql} concurrently; returns {name: rows} in the same order"""
+    results = await asyncio.gather(*(fetch_all(sql) for sql in queries.values()))
+    return dict(zip(queries, results))
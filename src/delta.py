@@ -0,0 +1,80 @@
+"""
+Row-level deltas between a stage's input and its previous results
+
+Reviews are matched on review_id. A matched review whose text hash
+differs from the stored one is "changed" and has to be processed again;
+all other reviews keep their stored results. Stages use this to score
+or tag only the delta and copy everything else over.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def text_hash(texts):
+    """Stable 64-bit hash per text, as int64 so it round-trips through CSV"""
+    values = pd.Series(texts).fillna("").astype(str).to_numpy(dtype=object)
+    return pd.util.hash_array(values).view(np.int64)
+
+
+def _same_values(a, b):
+    a = np.asarray(a, dtype=object)
+    b = np.asarray(b, dtype=object)
+    return (a == b) | (pd.isna(a) & pd.isna(b))
+
+
+class RowDelta:
+    """
+    How the incoming rows relate to the stored ones.
+
+    source        stored row position per incoming row, -1 for new reviews
+    new           incoming reviews with no stored row
+    text_changed  stored reviews whose text differs
+    removed       stored rows with no incoming review
+    """
+
+    def __init__(self, incoming_ids, incoming_hashes, stored_ids, stored_hashes):
+        stored_index = pd.Index(np.asarray(stored_ids, dtype=str))
+        if not stored_index.is_unique:
+            raise ValueError("stored results have duplicate review_ids")
+
+        self.source = stored_index.get_indexer(np.asarray(incoming_ids, dtype=str))
+        matched = self.source >= 0
+        self.new = ~matched
+
+        self.text_changed = np.zeros(len(self.source), dtype=bool)
+        self.text_changed[matched] = (
+            np.asarray(stored_hashes)[self.source[matched]] != np.asarray(incoming_hashes)[matched]
+        )
+
+        kept = np.zeros(len(stored_index), dtype=bool)
+        kept[self.source[matched]] = True
+        self.removed = ~kept
+
+    @property
+    def pending(self):
+        """Incoming rows to (re)process: new reviews and changed texts"""
+        return self.new | self.text_changed
+
+    @property
+    def reused(self):
+        return ~self.pending
+
+    def changed(self, incoming, stored, columns):
+        """
+        Incoming rows that differ from their stored row in any of the
+        columns (or in the text), plus new rows
+        """
+        changed = self.pending.copy()
+        matched = np.flatnonzero(~self.new)
+        for column in columns:
+            same = _same_values(
+                incoming[column].to_numpy()[matched],
+                stored[column].to_numpy()[self.source[matched]]
+            )
+            changed[matched[~same]] = True
+        return changed
+
+    def summary(self):
+        return (f"{int(self.new.sum())} new, {int(self.text_changed.sum())} changed, "
+                f"{int(self.reused.sum())} unchanged, {int(self.removed.sum())} removed")
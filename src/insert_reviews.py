@@ -1,71 +1,341 @@
-import pandas as pd
-from sqlalchemy import text
-from db import engine
-
-CSV_PATH = "data/sentiment/sentiment_results.csv"
-
-df = pd.read_csv(CSV_PATH)
-print(f"Loaded {len(df)} reviews from {CSV_PATH}")
-
-# Connect
-with engine.begin() as conn:
-
-    # -------------------------------------
-    # 1. Insert banks
-    # -------------------------------------
-    print("\n➡ Inserting banks...")
-
-    unique_banks = df[['bank_code', 'bank_name']].drop_duplicates()
-
-    for _, row in unique_banks.iterrows():
-        conn.execute(
-            text("""
-                INSERT INTO banks (bank_name, bank_code)
-                VALUES (:bank_name, :bank_code)
-                ON CONFLICT (bank_code) DO NOTHING;
-            """),
-            {"bank_name": row.bank_name, "bank_code": row.bank_code}
-        )
-
-    # -------------------
-    # Retrieve bank_id map
-    # -------------------
-    bank_map = {
-        code: id for code, id in conn.execute(
-            text("SELECT bank_code, bank_id FROM banks")
-        )
-    }
-
-    print("Bank ID map:", bank_map)
-
-    # -------------------------------------
-    # 2. Insert reviews
-    # -------------------------------------
-    print("\n➡ Inserting reviews...")
-
-    for _, row in df.iterrows():
-        conn.execute(
-            text("""
-                INSERT INTO reviews (
-                    review_id, bank_id, review_text, rating,
-                    review_date, sentiment_label, sentiment_score, source
-                )
-                VALUES (
-                    :review_id, :bank_id, :review_text, :rating,
-                    :review_date, :sentiment_label, :sentiment_score, :source
-                )
-                ON CONFLICT (review_id) DO NOTHING;
-            """),
-            {
-                "review_id": row.review_id,
-                "bank_id": bank_map[row.bank_code],
-                "review_text": row.review_text,
-                "rating": int(row.rating),
-                "review_date": row.review_date,
-                "sentiment_label": row.sentiment_label,
-                "sentiment_score": float(row.sentiment_score),
-                "source": row.source
-            }
-        )
-
-print("\n✅ Done! All reviews inserted successfully.")
+"""
+Bulk loader: sentiment results CSV -> PostgreSQL
+
+Reviews are streamed into a temporary staging table with COPY, batch_size
+rows at a time, then merged into `reviews` with one set-based
+INSERT ... SELECT. Banks are resolved by a join in the database instead
+of a Python-side id map. The per-bank/per-day aggregates in
+bank_daily_stats are then recomputed for the days the load touched only.
+
+Every row carries a content_hash of its loaded fields. Two merge modes:
+- insert: new review_ids are added, existing rows are left as they are
+- sync:   existing rows are updated only when their hash changed, so
+          unchanged rows are never rewritten and a nightly sync only
+          touches the delta
+
+Usage:
+    python src/insert_reviews.py                  # as a script (LOAD_MODE=insert|sync)
+    load_reviews(df, engine, batch_size, mode)    # from other modules
+"""
+
+import io
+
+import pandas as pd
+from sqlalchemy import text
+
+from config import settings
+from storage import read_dataset
+
+CSV_PATH = settings.PROCESSED_CSV
+
+# Staging columns, in COPY order
+STAGING_COLUMNS = [
+    "review_id", "bank_code", "review_text", "rating",
+    "review_date", "sentiment_label", "sentiment_score", "source"
+]
+
+CREATE_STAGING_SQL = """
+    CREATE TEMP TABLE reviews_staging (
+        review_id TEXT,
+        bank_code TEXT,
+        review_text TEXT,
+        rating INTEGER,
+        review_date DATE,
+        sentiment_label TEXT,
+        sentiment_score FLOAT,
+        source TEXT
+    ) ON COMMIT DROP;
+"""
+
+# Staged rows with their bank_id resolved and content hash computed once.
+# ROW(...)::text keeps NULLs and separators unambiguous in the hash.
+CREATE_INCOMING_SQL = """
+    CREATE TEMP TABLE reviews_incoming ON COMMIT DROP AS
+    SELECT
+        s.review_id, b.bank_id, s.review_text, s.rating,
+        s.review_date, s.sentiment_label, s.sentiment_score, s.source,
+        md5(ROW(
+            s.bank_code, s.review_text, s.rating, s.review_date,
+            s.sentiment_label, s.sentiment_score, s.source
+        )::text) AS content_hash
+    FROM reviews_staging s
+    JOIN banks b ON b.bank_code = s.bank_code;
+
+    ANALYZE reviews_incoming;
+"""
+
+# (bank_id, review_date) pairs touched by this load
+CREATE_AFFECTED_SQL = """
+    CREATE TEMP TABLE affected_days (
+        bank_id INTEGER,
+        review_date DATE
+    ) ON COMMIT DROP;
+"""
+
+# Databases created from an older schema.sql are upgraded in place:
+# content_hash, the reviews indexes and the bank_daily_stats table
+ADD_HASH_COLUMN_SQL = "ALTER TABLE reviews ADD COLUMN IF NOT EXISTS content_hash TEXT;"
+
+ADD_INDEXES_SQL = """
+    CREATE INDEX IF NOT EXISTS idx_reviews_bank_date ON reviews (bank_id, review_date);
+    CREATE INDEX IF NOT EXISTS idx_reviews_sentiment_label ON reviews (sentiment_label);
+"""
+
+STATS_TABLE_EXISTS_SQL = "SELECT to_regclass('bank_daily_stats') IS NOT NULL;"
+
+CREATE_STATS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS bank_daily_stats (
+        bank_id INTEGER NOT NULL REFERENCES banks(bank_id),
+        review_date DATE NOT NULL,
+        review_count INTEGER NOT NULL,
+        rating_count INTEGER NOT NULL,
+        rating_sum BIGINT NOT NULL,
+        positive_count INTEGER NOT NULL,
+        neutral_count INTEGER NOT NULL,
+        negative_count INTEGER NOT NULL,
+        sentiment_score_sum FLOAT NOT NULL,
+        PRIMARY KEY (bank_id, review_date)
+    );
+"""
+
+# sync only: review_date is part of the partitioned table's key, so a
+# review whose date (or bank) changed is deleted here and re-inserted below
+MOVE_SQL = """
+    WITH moved AS (
+        DELETE FROM reviews r
+        USING reviews_incoming i
+        WHERE r.review_id = i.review_id
+          AND (r.review_date <> i.review_date OR r.bank_id IS DISTINCT FROM i.bank_id)
+        RETURNING r.bank_id, r.review_date
+    )
+    INSERT INTO affected_days SELECT bank_id, review_date FROM moved;
+"""
+
+# sync only: rewrite rows whose content hash changed, leave the rest alone
+UPDATE_SQL = """
+    WITH changed AS (
+        UPDATE reviews r SET
+            review_text = i.review_text,
+            rating = i.rating,
+            sentiment_label = i.sentiment_label,
+            sentiment_score = i.sentiment_score,
+            source = i.source,
+            content_hash = i.content_hash
+        FROM reviews_incoming i
+        WHERE r.review_id = i.review_id
+          AND r.review_date = i.review_date
+          AND r.content_hash IS DISTINCT FROM i.content_hash
+        RETURNING r.bank_id, r.review_date
+    )
+    INSERT INTO affected_days SELECT bank_id, review_date FROM changed;
+"""
+
+INSERT_SQL = """
+    WITH added AS (
+        INSERT INTO reviews (
+            review_id, bank_id, review_text, rating,
+            review_date, sentiment_label, sentiment_score, source, content_hash
+        )
+        SELECT
+            i.review_id, i.bank_id, i.review_text, i.rating,
+            i.review_date, i.sentiment_label, i.sentiment_score, i.source, i.content_hash
+        FROM reviews_incoming i
+        WHERE NOT EXISTS (SELECT 1 FROM reviews r WHERE r.review_id = i.review_id)
+        RETURNING bank_id, review_date
+    )
+    INSERT INTO affected_days SELECT bank_id, review_date FROM added;
+"""
+
+MERGE_STEPS = {
+    "insert": [INSERT_SQL],
+    "sync": [MOVE_SQL, UPDATE_SQL, INSERT_SQL],
+}
+
+DAILY_STATS_SELECT = """
+    SELECT
+        r.bank_id,
+        r.review_date,
+        COUNT(*),
+        COUNT(r.rating),
+        COALESCE(SUM(r.rating), 0),
+        COUNT(*) FILTER (WHERE r.sentiment_label = 'positive'),
+        COUNT(*) FILTER (WHERE r.sentiment_label = 'neutral'),
+        COUNT(*) FILTER (WHERE r.sentiment_label = 'negative'),
+        COALESCE(SUM(r.sentiment_score), 0)
+    FROM reviews r
+    {join}
+    WHERE r.review_date IS NOT NULL     -- nullable in the pre-partitioning schema
+    GROUP BY r.bank_id, r.review_date
+"""
+
+DAILY_STATS_INSERT = """
+    INSERT INTO bank_daily_stats (
+        bank_id, review_date, review_count, rating_count, rating_sum,
+        positive_count, neutral_count, negative_count, sentiment_score_sum
+    )
+"""
+
+# Recompute only the (bank, day) rows touched by this load
+REFRESH_STATS_SQL = """
+    CREATE TEMP TABLE refresh_days ON COMMIT DROP AS
+    SELECT DISTINCT bank_id, review_date FROM affected_days;
+
+    DELETE FROM bank_daily_stats d
+    USING refresh_days a
+    WHERE d.bank_id = a.bank_id AND d.review_date = a.review_date;
+""" + DAILY_STATS_INSERT + DAILY_STATS_SELECT.format(join="""
+    JOIN refresh_days a ON r.bank_id = a.bank_id AND r.review_date = a.review_date""") + ";"
+
+REBUILD_STATS_SQL = (
+    "TRUNCATE bank_daily_stats;" + DAILY_STATS_INSERT + DAILY_STATS_SELECT.format(join="") + ";"
+)
+
+
+def upgrade_schema(conn):
+    """
+    Bring an older database up to the current schema. Returns True when
+    bank_daily_stats had to be created, i.e. it must be filled from scratch.
+    """
+    conn.execute(text(ADD_HASH_COLUMN_SQL))
+    conn.execute(text(ADD_INDEXES_SQL))
+    if conn.execute(text(STATS_TABLE_EXISTS_SQL)).scalar():
+        return False
+    print("\n➡ Creating bank_daily_stats (database predates it)...")
+    conn.execute(text(CREATE_STATS_TABLE_SQL))
+    return True
+
+
+def insert_banks(conn, df):
+    """Insert any bank not yet in `banks` (one round trip for all of them)"""
+    unique_banks = df[['bank_code', 'bank_name']].drop_duplicates('bank_code')
+    conn.execute(
+        text("""
+            INSERT INTO banks (bank_name, bank_code)
+            VALUES (:bank_name, :bank_code)
+            ON CONFLICT (bank_code) DO NOTHING;
+        """),
+        unique_banks.to_dict("records")
+    )
+    return len(unique_banks)
+
+
+def prepare_reviews(df):
+    """Select and type the staging columns; first occurrence of a review_id wins"""
+    staged = df.drop_duplicates('review_id', keep='first')[STAGING_COLUMNS].copy()
+    # review_date is part of the partitioned primary key
+    missing = staged['review_id'].isna() | staged['review_date'].isna()
+    if missing.any():
+        print(f"⚠ Skipping {missing.sum():,} reviews without review_id or review_date")
+        staged = staged[~missing]
+    staged['rating'] = pd.to_numeric(staged['rating'], errors='coerce').astype('Int64')
+    staged['sentiment_score'] = pd.to_numeric(staged['sentiment_score'], errors='coerce')
+    return staged
+
+
+def _copy_batches(conn, staged, batch_size):
+    """Stream the frame into reviews_staging with COPY ... FROM STDIN"""
+    copy_sql = (
+        f"COPY reviews_staging ({', '.join(STAGING_COLUMNS)}) "
+        "FROM STDIN WITH (FORMAT csv)"
+    )
+    cursor = conn.connection.cursor()
+    try:
+        for start in range(0, len(staged), batch_size):
+            buf = io.StringIO()
+            # empty unquoted fields are read back as NULL
+            staged.iloc[start:start + batch_size].to_csv(buf, index=False, header=False)
+            buf.seek(0)
+            cursor.copy_expert(copy_sql, buf)
+    finally:
+        cursor.close()
+
+
+def _insert_batches(conn, staged, batch_size):
+    """Fallback for drivers without COPY support: batched executemany"""
+    insert = text(
+        f"INSERT INTO reviews_staging ({', '.join(STAGING_COLUMNS)}) "
+        f"VALUES ({', '.join(':' + c for c in STAGING_COLUMNS)})"
+    )
+    records = staged.astype(object).where(staged.notna(), None)
+    for start in range(0, len(records), batch_size):
+        conn.execute(insert, records.iloc[start:start + batch_size].to_dict("records"))
+
+
+def load_reviews(df, engine=None, batch_size=None, mode=None):
+    """
+    Load a sentiment results frame into `banks` and `reviews` in one
+    transaction. mode is "insert" (existing review_ids untouched) or
+    "sync" (existing rows updated when their content hash changed).
+
+    Returns a dict with the number of staged, inserted, updated and
+    unchanged reviews.
+    """
+    if engine is None:
+        from db import engine
+    batch_size = batch_size or settings.LOAD_BATCH_SIZE
+    mode = mode or settings.LOAD_MODE
+    if mode not in MERGE_STEPS:
+        raise ValueError(f"Unknown load mode {mode!r}, expected one of {sorted(MERGE_STEPS)}")
+
+    staged = prepare_reviews(df)
+
+    with engine.begin() as conn:
+        new_stats_table = upgrade_schema(conn)
+
+        print("\n➡ Inserting banks...")
+        insert_banks(conn, df)
+
+        print(f"\n➡ Staging {len(staged):,} reviews (batches of {batch_size:,})...")
+        conn.execute(text(CREATE_STAGING_SQL))
+        if engine.dialect.driver == "psycopg2":
+            _copy_batches(conn, staged, batch_size)
+        else:
+            _insert_batches(conn, staged, batch_size)
+
+        print(f"\n➡ Merging into reviews ({mode})...")
+        conn.execute(text(CREATE_INCOMING_SQL))
+        conn.execute(text(CREATE_AFFECTED_SQL))
+        counts = {
+            sql: conn.execute(text(sql)).rowcount for sql in MERGE_STEPS[mode]
+        }
+        moved = counts.get(MOVE_SQL, 0)
+        inserted = counts[INSERT_SQL] - moved
+        updated = counts.get(UPDATE_SQL, 0) + moved
+
+        if new_stats_table:
+            print("\n➡ Building bank_daily_stats from all reviews...")
+            conn.execute(text(REBUILD_STATS_SQL))
+        else:
+            print("\n➡ Refreshing bank_daily_stats...")
+            conn.execute(text(REFRESH_STATS_SQL))
+
+    stats = {
+        "staged": len(staged),
+        "inserted": inserted,
+        "updated": updated,
+        "unchanged": len(staged) - inserted - updated,
+    }
+    print(f"Inserted {stats['inserted']:,} new reviews, updated {stats['updated']:,}, "
+          f"left {stats['unchanged']:,} unchanged")
+    return stats
+
+
+def rebuild_daily_stats(engine=None):
+    """Recompute bank_daily_stats from scratch (e.g. after a manual edit of reviews)"""
+    if engine is None:
+        from db import engine
+    with engine.begin() as conn:
+        conn.execute(text(REBUILD_STATS_SQL))
+
+
+def main():
+    df = read_dataset(CSV_PATH, columns=["bank_name", *STAGING_COLUMNS])
+    print(f"Loaded {len(df)} reviews from {CSV_PATH}")
+
+    load_reviews(df)
+
+    print("\n✅ Done! All reviews inserted successfully.")
+
+
+if __name__ == "__main__":
+    main()
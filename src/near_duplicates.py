@@ -0,0 +1,177 @@
+"""
+Near-duplicate review detection (MinHash + LSH)
+
+Each review is reduced to a MinHash signature over its character
+3-grams, computed in NumPy for a whole batch at once. Signatures are
+split into LSH bands; reviews sharing a band bucket become candidates and
+are confirmed when their estimated Jaccard similarity reaches the
+threshold. Cost grows linearly with the number of reviews, there is no
+pairwise comparison.
+
+Clustering is incremental ("leader" style): a review joins the cluster of
+the first earlier review it matches, otherwise it starts its own cluster.
+Cluster ids never change once assigned, so chunks can be tagged and
+written one after another.
+
+The index holds a signature and LSH bucket entries for every review it
+keeps, about 520 bytes per review. With `window` set it only keeps the
+most recent `window` reviews (evicted a batch at a time), so memory stays
+bounded on out-of-core runs; a review is then only matched against that
+window of earlier reviews. window=None keeps everything.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+# Punctuation is dropped before shingling, emoji and letters are kept
+_PUNCTUATION = r"[!-/:-@\[-`{-~]+"
+_SPACES = r"\s+"
+
+
+def normalize_for_shingles(texts):
+    return (
+        texts.astype(str)
+        .str.lower()
+        .str.replace(_PUNCTUATION, " ", regex=True)
+        .str.replace(_SPACES, " ", regex=True)
+        .str.strip()
+        .str.replace("\x00", "", regex=False)
+        # every text needs at least one 3-gram
+        .str.pad(3, side="right", fillchar="\x01")
+    )
+
+
+def choose_bands(num_perm, threshold):
+    """Pick (bands, rows) so the LSH S-curve turns at about `threshold`"""
+    best = None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        turn = (1 / bands) ** (1 / rows)
+        if best is None or abs(turn - threshold) < best[0]:
+            best = (abs(turn - threshold), bands, rows)
+    return best[1], best[2]
+
+
+class NearDuplicateIndex:
+    """Incremental MinHash/LSH index assigning dup_cluster_id values"""
+
+    def __init__(self, threshold=0.8, num_perm=64, seed=1, batch_size=10000, window=None):
+        self.threshold = threshold
+        self.window = window
+        self.num_perm = num_perm
+        self.batch_size = batch_size
+        self.bands, self.rows = choose_bands(num_perm, threshold)
+
+        rng = np.random.default_rng(seed)
+        # multiply-shift hash family: h(x) = (a*x + b) >> 32 (mod 2**64)
+        self._a = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+        self._band_mix = rng.integers(1, 2**63, size=self.rows, dtype=np.uint64) | np.uint64(1)
+
+        self._buckets = [dict() for _ in range(self.bands)]
+        self._signatures = []   # (uint32 array, first doc id) per retained batch
+        self._cluster_ids = []
+        self.size = 0           # reviews added so far, the next doc id
+        self.retained = 0       # reviews still held in the index
+
+    # -----------------------------------------------------------
+    def signatures(self, texts):
+        """MinHash signatures (n_texts x num_perm, uint32) for a Series of texts"""
+        norm = normalize_for_shingles(texts)
+        out = np.empty((len(norm), self.num_perm), dtype=np.uint32)
+
+        for start in range(0, len(norm), self.batch_size):
+            batch = norm.iloc[start:start + self.batch_size]
+            buf = np.frombuffer(("\x00".join(batch) + "\x00").encode("utf-8"), dtype=np.uint8)
+            buf = buf.astype(np.uint64)
+
+            # byte 3-grams packed into one integer, skipping text separators
+            grams = (buf[:-2] << np.uint64(16)) | (buf[1:-1] << np.uint64(8)) | buf[2:]
+            valid = (buf[:-2] != 0) & (buf[1:-1] != 0) & (buf[2:] != 0)
+            doc_of = np.cumsum(buf == 0)[:-2]
+            grams, doc_of = grams[valid], doc_of[valid]
+
+            # hash each distinct 3-gram once (one row per permutation), then
+            # take the per-text minimum one permutation at a time: 1-D
+            # reduceat over contiguous memory is much faster than axis=0
+            distinct, inverse = np.unique(grams, return_inverse=True)
+            table = ((distinct * self._a[:, None] + self._b[:, None]) >> np.uint64(32)).astype(np.uint32)
+            starts = np.flatnonzero(np.r_[True, doc_of[1:] != doc_of[:-1]])
+            for perm in range(self.num_perm):
+                out[start:start + len(batch), perm] = np.minimum.reduceat(table[perm][inverse], starts)
+
+        return out
+
+    def _band_keys(self, sigs):
+        keys = np.empty((len(sigs), self.bands), dtype=np.uint64)
+        for band in range(self.bands):
+            part = sigs[:, band * self.rows:(band + 1) * self.rows].astype(np.uint64)
+            keys[:, band] = (part * self._band_mix).sum(axis=1) + np.uint64(band)
+        return keys
+
+    def _signature(self, doc_id):
+        for sigs, offset in self._signatures:
+            if doc_id < offset + len(sigs):
+                return sigs[doc_id - offset]
+        raise KeyError(doc_id)
+
+    def _cluster_of(self, doc_id):
+        for ids, offset in self._cluster_ids:
+            if doc_id < offset + len(ids):
+                return ids[doc_id - offset]
+        raise KeyError(doc_id)
+
+    def _evict(self):
+        """Drop the oldest batches while the rest still cover the window"""
+        while self._signatures and self.retained - len(self._signatures[0][0]) >= self.window:
+            sigs, offset = self._signatures.pop(0)
+            self._cluster_ids.pop(0)
+            self.retained -= len(sigs)
+
+            # bucket entries point at the first doc with that key, so the
+            # entries owned by this batch are exactly those holding its ids
+            for i, doc_keys in enumerate(self._band_keys(sigs).tolist()):
+                for band, key in enumerate(doc_keys):
+                    if self._buckets[band].get(key) == offset + i:
+                        del self._buckets[band][key]
+
+    # -----------------------------------------------------------
+    def add(self, texts):
+        """Index a batch of texts and return their dup_cluster_id values"""
+        sigs = self.signatures(texts)
+        keys = self._band_keys(sigs).tolist()
+        offset = self.size
+        cluster_ids = np.arange(offset, offset + len(sigs), dtype=np.int64)
+
+        # register the batch first so candidates inside it can be looked up
+        self._signatures.append((sigs, offset))
+        self._cluster_ids.append((cluster_ids, offset))
+        self.size += len(sigs)
+        self.retained += len(sigs)
+
+        for i, doc_keys in enumerate(keys):
+            doc_id = offset + i
+            checked = set()
+
+            for band, key in enumerate(doc_keys):
+                leader = self._buckets[band].get(key)
+                if leader is None:
+                    self._buckets[band][key] = doc_id
+                elif leader not in checked and cluster_ids[i] == doc_id:
+                    checked.add(leader)
+                    similarity = np.mean(self._signature(leader) == sigs[i])
+                    if similarity >= self.threshold:
+                        cluster_ids[i] = self._cluster_of(leader)
+
+        if self.window is not None:
+            self._evict()
+        return cluster_ids
+
+
+def tag_near_duplicates(texts, threshold=0.8, num_perm=64):
+    """One-shot helper: dup_cluster_id for every text in a Series"""
+    index = NearDuplicateIndex(threshold=threshold, num_perm=num_perm)
+    return pd.Series(index.add(texts), index=texts.index, name="dup_cluster_id")
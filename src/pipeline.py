@@ -0,0 +1,396 @@
+"""
+Pipeline runner
+
+Runs the whole workflow as one DAG of stages:
+
+    scrape -> preprocess -> sentiment -> themes
+                                      -> load   (PostgreSQL)
+
+Every stage declares its input files, output files, source modules and
+parameters. A stage's fingerprint is a hash over all of these (file
+contents, not timestamps); after a successful run it is recorded in
+data/pipeline_state.json. On the next run a stage is skipped when its
+fingerprint is unchanged and its outputs still exist. A stage that
+rewrites identical outputs therefore does not invalidate the stages
+after it.
+
+Stages whose dependencies are done run concurrently, so theme
+extraction and the DB load share the wall clock. Scraping and the DB
+load run every time, the other stages only when stale.
+
+    python src/pipeline.py                  # run everything that is stale
+    python src/pipeline.py themes           # only themes and what it needs
+    python src/pipeline.py --skip scrape    # keep the raw data on disk
+    python src/pipeline.py --force          # ignore the recorded state
+    python src/pipeline.py --dry-run        # show what would run
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import config
+from config import DATA_PATHS, PIPELINE_CONFIG, settings
+from storage import dataset_location
+
+import analytics
+import delta
+import insert_reviews
+import monitor
+import near_duplicates
+import preprocessing
+import raw_store
+import scraper
+import sentiment_analysis
+import storage
+import theme_extraction
+import token_store
+import topic_models
+
+
+_print_lock = threading.Lock()
+
+
+def log(message):
+    # one write per line, so concurrent stages do not interleave
+    with _print_lock:
+        sys.stdout.write(f"[pipeline] {message}\n")
+        sys.stdout.flush()
+
+
+class Stage:
+    """
+    One pipeline step.
+
+    run      callable; returning False (or raising) marks the stage failed
+    inputs   files/directories read by the stage
+    outputs  files/directories it writes (checked after the run)
+    code     modules whose source is part of the fingerprint
+    params   JSON-serializable settings that change the outputs
+    always   run on every pipeline run (e.g. scraping a live store)
+    """
+
+    def __init__(self, name, run, deps=(), inputs=(), outputs=(), code=(), params=None,
+                 always=False):
+        self.name = name
+        self.run = run
+        self.deps = list(deps)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.code = list(code)
+        self.params = params or {}
+        self.always = always
+
+
+# -----------------------------------------------------------
+# FINGERPRINTS
+# -----------------------------------------------------------
+class FileHasher:
+    """
+    Content hashes of files and directories. A file's hash is reused from
+    the previous run while its size and mtime are unchanged.
+    """
+
+    def __init__(self, known=None):
+        self.known = dict(known or {})
+        self._lock = threading.Lock()
+
+    def file_digest(self, path):
+        stat = os.stat(path)
+        with self._lock:
+            entry = self.known.get(path)
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return entry["sha256"]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        with self._lock:
+            self.known[path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                                "sha256": digest.hexdigest()}
+        return digest.hexdigest()
+
+    def digest(self, path):
+        """Hash of a file, of every file under a directory, or 'missing'"""
+        if os.path.isfile(path):
+            return self.file_digest(path)
+        if not os.path.isdir(path):
+            return "missing"
+
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                digest.update(os.path.relpath(file_path, path).encode("utf-8"))
+                digest.update(self.file_digest(file_path).encode("ascii"))
+        return digest.hexdigest()
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.known)
+
+
+def fingerprint(stage, hasher):
+    payload = {
+        "params": stage.params,
+        "inputs": {path: hasher.digest(path) for path in stage.inputs},
+        "code": {module.__name__: hasher.digest(module.__file__) for module in stage.code},
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+# -----------------------------------------------------------
+# STATE
+# -----------------------------------------------------------
+class PipelineState:
+    """Fingerprints of the last successful run of each stage, kept in a JSON file"""
+
+    def __init__(self, path=None):
+        self.path = path or DATA_PATHS["pipeline_state"]
+        self.stages = {}
+        self.files = {}
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                saved = json.load(f)
+            self.stages = saved.get("stages", {})
+            self.files = saved.get("files", {})
+        self._lock = threading.Lock()
+
+    def fingerprint(self, name):
+        return self.stages.get(name, {}).get("fingerprint")
+
+    def record(self, name, stage_fingerprint, seconds, files):
+        with self._lock:
+            self.stages[name] = {
+                "fingerprint": stage_fingerprint,
+                "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "seconds": round(seconds, 2),
+            }
+            self.files = files
+            self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"stages": self.stages, "files": self.files}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+# -----------------------------------------------------------
+# STAGES
+# -----------------------------------------------------------
+def build_stages():
+    """The project's stages, wired by the paths each step reads and writes"""
+    scrape_mode = config.SCRAPING_CONFIG["mode"]
+    review_scraper = scraper.PlayStoreScraper()
+    raw_path = DATA_PATHS["raw_store"] if scrape_mode == "incremental" else review_scraper.raw_output_path()
+
+    preprocessor = preprocessing.ReviewPreprocessor(input_path=raw_path)
+    analyzer = sentiment_analysis.SentimentAnalyzer()
+    extractor = theme_extraction.ThemeExtractor()
+
+    processed_path = dataset_location(preprocessor.output_path)
+    sentiment_path = dataset_location(analyzer.output_path)
+    storage_params = config.STORAGE_CONFIG
+
+    return [
+        Stage(
+            "scrape",
+            run=scraper.main,
+            outputs=[raw_path],
+            always=True,
+        ),
+        Stage(
+            "preprocess",
+            run=preprocessor.process,
+            deps=["scrape"],
+            inputs=[raw_path],
+            outputs=[processed_path, preprocessor.tokens_path],
+            code=[preprocessing, near_duplicates, raw_store, token_store, storage],
+            params={
+                "near_dup_threshold": config.PREPROCESSING_CONFIG["near_dup_threshold"],
+                "storage": storage_params,
+            },
+        ),
+        Stage(
+            "sentiment",
+            run=analyzer.process,
+            deps=["preprocess"],
+            inputs=[processed_path],
+            outputs=[sentiment_path, dataset_location(DATA_PATHS["sentiment_cube"])],
+            code=[sentiment_analysis, analytics, delta, monitor, storage],
+            params={
+                "vader_lexicon_dir": config.SENTIMENT_CONFIG["vader_lexicon_dir"],
+                "storage": storage_params,
+            },
+        ),
+        Stage(
+            "themes",
+            run=extractor.process,
+            deps=["sentiment"],
+            inputs=[sentiment_path, extractor.tokens_path],
+            outputs=[extractor.output_path, extractor.lda_output_path,
+                     dataset_location(extractor.review_themes_path), extractor.theme_counts_path],
+            code=[theme_extraction, delta, token_store, topic_models, storage],
+            params={
+                "lda_learning_method": config.THEME_CONFIG["lda_learning_method"],
+                "lda_batch_size": config.THEME_CONFIG["lda_batch_size"],
+                "lda_max_iter": config.THEME_CONFIG["lda_max_iter"],
+                "lexicon": config.THEME_LEXICON,
+                "default_theme": config.DEFAULT_THEME,
+                "storage": storage_params,
+            },
+        ),
+        Stage(
+            "load",
+            run=insert_reviews.main,
+            deps=["sentiment"],
+            # the database is not a file the runner can check: it may have been
+            # dropped or rebuilt since the last load. The merge only writes
+            # changed rows, so loading every run is cheap and always correct.
+            always=True,
+            inputs=[dataset_location(insert_reviews.CSV_PATH)],
+            code=[insert_reviews],
+            params={
+                "mode": settings.LOAD_MODE,
+                "database": os.getenv("DATABASE_URL") or
+                            f"{settings.DB_USER}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}",
+            },
+        ),
+    ]
+
+
+# -----------------------------------------------------------
+# RUNNER
+# -----------------------------------------------------------
+class Pipeline:
+    """Run stages in dependency order, concurrently where the DAG allows"""
+
+    def __init__(self, stages, state=None, max_workers=None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.state = state or PipelineState()
+        self.hasher = FileHasher(self.state.files)
+        self.max_workers = max_workers or PIPELINE_CONFIG["max_workers"]
+
+        for stage in stages:
+            unknown = [dep for dep in stage.deps if dep not in self.stages]
+            if unknown:
+                raise ValueError(f"Stage {stage.name!r} depends on unknown stages {unknown}")
+
+    def select(self, targets=None):
+        """Names of the targets and everything upstream of them, in DAG order"""
+        if not targets:
+            return list(self.stages)
+        unknown = [name for name in targets if name not in self.stages]
+        if unknown:
+            raise ValueError(f"Unknown stages {unknown}; choose from {list(self.stages)}")
+
+        selected = set()
+        pending = list(targets)
+        while pending:
+            name = pending.pop()
+            if name not in selected:
+                selected.add(name)
+                pending.extend(self.stages[name].deps)
+        return [name for name in self.stages if name in selected]
+
+    def is_current(self, stage, stage_fingerprint):
+        if stage.always:
+            return False
+        return (
+            self.state.fingerprint(stage.name) == stage_fingerprint
+            and all(os.path.exists(path) for path in stage.outputs)
+        )
+
+    def _run_stage(self, stage, force):
+        """Run one stage unless it is current; returns 'ran' or 'skipped'"""
+        stage_fingerprint = fingerprint(stage, self.hasher)
+        if not force and self.is_current(stage, stage_fingerprint):
+            log(f"{stage.name}: up to date, skipped")
+            return "skipped"
+
+        log(f"{stage.name}: running")
+        start = time.perf_counter()
+        if stage.run() is False:
+            raise RuntimeError(f"stage {stage.name!r} reported failure")
+        missing = [path for path in stage.outputs if not os.path.exists(path)]
+        if missing:
+            raise RuntimeError(f"stage {stage.name!r} did not write {missing}")
+        seconds = time.perf_counter() - start
+
+        # outputs are recorded too, so the next run hashes them from the cache
+        for path in stage.outputs:
+            self.hasher.digest(path)
+        self.state.record(stage.name, stage_fingerprint, seconds, self.hasher.snapshot())
+        log(f"{stage.name}: done in {seconds:.1f}s")
+        return "ran"
+
+    def run(self, targets=None, skip=(), force=False, dry_run=False):
+        """
+        Run the selected stages; returns {stage: 'ran' | 'skipped' | 'failed'
+        | 'blocked'}. Stages in skip are treated as done without running.
+        """
+        selected = self.select(targets)
+        status = {name: "skipped" for name in selected if name in skip}
+        todo = [name for name in selected if name not in status]
+
+        if dry_run:
+            for name in todo:
+                stage = self.stages[name]
+                current = not force and self.is_current(stage, fingerprint(stage, self.hasher))
+                log(f"{name}: {'up to date' if current else 'would run'}")
+            return {name: "dry-run" for name in todo}
+
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while todo or running:
+                for name in list(todo):
+                    deps = [dep for dep in self.stages[name].deps if dep in selected]
+                    if any(status.get(dep) in ("failed", "blocked") for dep in deps):
+                        status[name] = "blocked"
+                        todo.remove(name)
+                    elif all(status.get(dep) in ("ran", "skipped") for dep in deps):
+                        running[pool.submit(self._run_stage, self.stages[name], force)] = name
+                        todo.remove(name)
+
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        status[name] = future.result()
+                    except Exception as e:
+                        status[name] = "failed"
+                        log(f"{name}: FAILED - {e}")
+
+        log(", ".join(f"{name}={status[name]}" for name in selected))
+        return status
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the review analytics pipeline")
+    parser.add_argument("targets", nargs="*", help="stages to bring up to date (default: all)")
+    parser.add_argument("--skip", action="append", default=[], help="treat a stage as done")
+    parser.add_argument("--force", action="store_true", help="rerun stages even if current")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would run")
+    args = parser.parse_args(argv)
+
+    pipeline = Pipeline(build_stages())
+    status = pipeline.run(args.targets, skip=args.skip, force=args.force, dry_run=args.dry_run)
+    return 1 if any(s in ("failed", "blocked") for s in status.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,250 +1,494 @@
-"""
-Data Preprocessing Script
-Task 1: Data Preprocessing
-
-This script cleans and preprocesses the scraped reviews data.
-- Handles missing values
-- Normalizes dates
-- Cleans text data
-- Removes duplicates
-- Removes Amharic text
-"""
-
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-import pandas as pd
-import numpy as np
-from datetime import datetime
-import re
-
-from config import DATA_PATHS
-
-
-class ReviewPreprocessor:
-    """Preprocessor class for review data"""
-
-    def __init__(self, input_path=None, output_path=None):
-        self.input_path = input_path or DATA_PATHS['raw_reviews']
-        self.output_path = output_path or DATA_PATHS['processed_reviews']
-        self.df = None
-        self.stats = {}
-
-    def load_data(self):
-        print("Loading raw data...")
-        try:
-            self.df = pd.read_csv(self.input_path)
-            print(f"Loaded {len(self.df)} reviews")
-            self.stats['original_count'] = len(self.df)
-            return True
-        except Exception as e:
-            print(f"ERROR loading file: {e}")
-            return False
-
-    # -----------------------------------------------------------
-    # REMOVE DUPLICATES
-    # -----------------------------------------------------------
-    def remove_duplicates(self):
-        print("\n[0/5] Removing duplicate reviews...")
-
-        before = len(self.df)
-        self.df = self.df.drop_duplicates(subset=['review_id', 'review_text'])
-        removed = before - len(self.df)
-
-        print(f"Removed {removed} duplicate rows")
-        self.stats['duplicates_removed'] = removed
-
-    # -----------------------------------------------------------
-    # REMOVE AMHARIC TEXT
-    # -----------------------------------------------------------
-    def remove_amharic_text(self):
-        print("\n[1/5] Removing Amharic/Ethiopic text...")
-
-        amharic_pattern = re.compile(r"[\u1200-\u137F]+")
-
-        def clean_amharic(text):
-            if isinstance(text, str):
-                return amharic_pattern.sub("", text)
-            return text
-
-        self.df['review_text'] = self.df['review_text'].apply(clean_amharic)
-        print("Amharic text removed")
-
-    # -----------------------------------------------------------
-    # MISSING VALUE CHECK
-    # -----------------------------------------------------------
-    def check_missing_data(self):
-        print("\n[2/5] Checking for missing data...")
-
-        missing = self.df.isnull().sum()
-        missing_pct = (missing / len(self.df)) * 100
-
-        print("\nMissing values:")
-        for col in missing.index:
-            if missing[col] > 0:
-                print(f"  {col}: {missing[col]} ({missing_pct[col]:.2f}%)")
-
-        critical_cols = ['review_text', 'rating', 'bank_name']
-        missing_critical = self.df[critical_cols].isnull().sum()
-
-        if missing_critical.sum() > 0:
-            print("\nWARNING: Missing values in critical columns:")
-            print(missing_critical[missing_critical > 0])
-
-    # -----------------------------------------------------------
-    # HANDLE MISSING VALUES
-    # -----------------------------------------------------------
-    def handle_missing_values(self):
-        print("\n[3/5] Handling missing values...")
-
-        critical_cols = ['review_text', 'rating', 'bank_name']
-        before_count = len(self.df)
-
-        # Remove rows missing critical info
-        self.df = self.df.dropna(subset=critical_cols)
-        removed = before_count - len(self.df)
-
-        if removed > 0:
-            print(f"Removed {removed} rows with missing critical values")
-
-        # Fill non-critical columns
-        if 'user_name' in self.df.columns:
-            self.df['user_name'] = self.df['user_name'].fillna('Anonymous')
-
-        if 'thumbs_up' in self.df.columns:
-            self.df['thumbs_up'] = self.df['thumbs_up'].fillna(0)
-
-        self.stats['rows_removed_missing'] = removed
-        self.stats['count_after_missing'] = len(self.df)
-
-    # -----------------------------------------------------------
-    # NORMALIZE DATE
-    # -----------------------------------------------------------
-    def normalize_dates(self):
-        print("\n[4/5] Normalizing dates...")
-
-        try:
-            self.df['review_date'] = pd.to_datetime(self.df['review_date'])
-            self.df['review_date'] = self.df['review_date'].dt.strftime('%Y-%m-%d')
-
-            print(f"Date range: {self.df['review_date'].min()} to {self.df['review_date'].max()}")
-
-        except Exception as e:
-            print(f"WARNING: Error normalizing dates: {e}")
-
-    # -----------------------------------------------------------
-    # CLEAN REVIEW TEXT
-    # -----------------------------------------------------------
-    def clean_text(self):
-        print("\n[5/5] Cleaning review text...")
-
-        def clean_review_text(text):
-            if pd.isna(text) or text == '':
-                return ''
-            text = str(text)
-            text = re.sub(r'\s+', ' ', text)
-            return text.strip()
-
-        before_count = len(self.df)
-
-        self.df['review_text'] = self.df['review_text'].apply(clean_review_text)
-        self.df = self.df[self.df['review_text'].str.len() > 0]
-
-        removed = before_count - len(self.df)
-
-        if removed > 0:
-            print(f"Removed {removed} empty reviews")
-
-        # Add text length
-        self.df['text_length'] = self.df['review_text'].str.len()
-
-        self.stats['empty_reviews_removed'] = removed
-
-    # -----------------------------------------------------------
-    # FINAL CLEAN OUTPUT
-    # -----------------------------------------------------------
-    def prepare_final_output(self):
-        print("\nPreparing final dataset...")
-
-        output_columns = [
-            'review_id', 'review_text', 'rating', 'review_date',
-            'bank_code', 'bank_name',
-            'user_name', 'thumbs_up',
-            'text_length', 'source'
-        ]
-
-        # Keep only columns that exist
-        output_columns = [c for c in output_columns if c in self.df.columns]
-
-        self.df = self.df[output_columns]
-        self.df = self.df.sort_values(['bank_code', 'review_date'], ascending=[True, False])
-        self.df = self.df.reset_index(drop=True)
-
-        print(f"Final dataset: {len(self.df)} reviews")
-
-    # -----------------------------------------------------------
-    # SAVE OUTPUT
-    # -----------------------------------------------------------
-    def save_data(self):
-        print("\nSaving processed data...")
-
-        try:
-            os.makedirs(os.path.dirname(self.output_path), exist_ok=True)
-            self.df.to_csv(self.output_path, index=False)
-            print(f"Data saved to: {self.output_path}")
-            self.stats['final_count'] = len(self.df)
-            return True
-        except Exception as e:
-            print(f"ERROR saving file: {e}")
-            return False
-
-    # -----------------------------------------------------------
-    # REPORT
-    # -----------------------------------------------------------
-    def generate_report(self):
-        print("\n" + "=" * 60)
-        print("PREPROCESSING REPORT")
-        print("=" * 60)
-
-        print(f"\nOriginal: {self.stats.get('original_count', 0)}")
-        print(f"Duplicates removed: {self.stats.get('duplicates_removed', 0)}")
-        print(f"Rows missing removed: {self.stats.get('rows_removed_missing', 0)}")
-        print(f"Empty removed: {self.stats.get('empty_reviews_removed', 0)}")
-        print(f"Final cleaned count: {self.stats.get('final_count', 0)}")
-
-    # -----------------------------------------------------------
-    # MASTER PROCESS
-    # -----------------------------------------------------------
-    def process(self):
-        print("=" * 60)
-        print("STARTING DATA PREPROCESSING")
-        print("=" * 60)
-
-        if not self.load_data():
-            return False
-
-        self.remove_duplicates()
-        self.remove_amharic_text()
-        self.check_missing_data()
-        self.handle_missing_values()
-        self.normalize_dates()
-        self.clean_text()
-        self.prepare_final_output()
-
-        if self.save_data():
-            self.generate_report()
-            print("\n✓ Preprocessing completed successfully!")
-            return True
-
-        print("\n✗ Preprocessing failed!")
-        return False
-
-
-def main():
-    processor = ReviewPreprocessor()
-    processor.process()
-
-
-if __name__ == "__main__":
-    main()
+"""
+Data Preprocessing Script
+Task 1: Data Preprocessing
+
+This script cleans and preprocesses the scraped reviews data.
+- Handles missing values
+- Normalizes dates
+- Cleans text data
+- Removes duplicates
+- Removes Amharic text
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import numpy as np
+from datetime import datetime
+import re
+
+from config import DATA_PATHS, PREPROCESSING_CONFIG
+from raw_store import RawReviewStore
+from near_duplicates import NearDuplicateIndex
+from token_store import TokenStore, TokenStoreWriter
+from storage import DatasetWriter, write_dataset
+
+try:
+    import pyarrow  # noqa: F401
+    # Arrow-backed strings run .str regex ops in native code (RE2)
+    TEXT_DTYPE = pd.StringDtype("pyarrow")
+except ImportError:
+    TEXT_DTYPE = pd.StringDtype("python")
+
+# Read ids and text as strings so every chunk hashes them the same way
+RAW_DTYPES = {'review_id': str, 'review_text': str}
+
+# Ethiopic script block (a plain string: RE2 does not understand \u escapes)
+AMHARIC_PATTERN = "[\u1200-\u137F]+"
+
+# Every character Python's re treats as \s, spelled out so the pattern
+# matches the same characters under RE2, whose \s is ASCII only
+_WHITESPACE_CHARS = "".join(c for c in map(chr, range(0x3001)) if re.match(r"\s", c))
+WHITESPACE_PATTERN = f"[{_WHITESPACE_CHARS}]+"
+
+
+def clean_text_column(texts):
+    """
+    Vectorized text cleaning for a whole column:
+    drop Amharic script, collapse whitespace runs to one space and trim.
+    Missing values stay missing.
+    """
+    return (
+        texts.astype(TEXT_DTYPE)
+        .str.replace(AMHARIC_PATTERN, "", regex=True)
+        .str.replace(WHITESPACE_PATTERN, " ", regex=True)
+        .str.strip(" ")
+    )
+
+
+class HashSet:
+    """
+    Compact set of uint64 row hashes for cross-chunk de-duplication.
+
+    Hashes live in a few sorted NumPy runs (8 bytes per review) that are
+    merged whenever a newer run grows as large as an older one.
+    """
+
+    def __init__(self):
+        self.runs = []
+
+    def __len__(self):
+        return sum(len(run) for run in self.runs)
+
+    def contains(self, keys):
+        found = np.zeros(len(keys), dtype=bool)
+        for run in self.runs:
+            if not len(run):
+                continue
+            idx = np.minimum(np.searchsorted(run, keys), len(run) - 1)
+            found |= run[idx] == keys
+        return found
+
+    def add(self, keys):
+        if not len(keys):
+            return
+        run = np.unique(keys)
+        while self.runs and len(self.runs[-1]) <= len(run):
+            run = np.union1d(self.runs.pop(), run)
+        self.runs.append(run)
+
+
+class ReviewPreprocessor:
+    """Preprocessor class for review data"""
+
+    def __init__(self, input_path=None, output_path=None, chunksize=None):
+        self.input_path = input_path or DATA_PATHS['raw_reviews']
+        self.output_path = output_path or DATA_PATHS['processed_reviews']
+        # token ids of the final review_text, saved next to the output
+        self.tokens_path = os.path.splitext(self.output_path)[0] + ".tokens.npz"
+        self.tokens = None
+        self.chunksize = chunksize or PREPROCESSING_CONFIG['chunksize']
+        self.near_dup_threshold = PREPROCESSING_CONFIG['near_dup_threshold']
+        self.near_dup_window = PREPROCESSING_CONFIG['near_dup_window'] or None
+        self.dup_index = None
+        self.df = None
+        self.stats = {}
+        # step messages are silenced while processing chunk by chunk
+        self.verbose = True
+
+    def log(self, message):
+        if self.verbose:
+            print(message)
+
+    def load_data(self):
+        print("Loading raw data...")
+        try:
+            if os.path.isdir(self.input_path):
+                # partitioned store written by incremental scraping
+                self.df = RawReviewStore(self.input_path).read()
+            elif self.input_path.endswith(".jsonl"):
+                self.df = pd.read_json(self.input_path, lines=True)
+            elif self.input_path.endswith(".parquet"):
+                self.df = pd.read_parquet(self.input_path)
+            else:
+                self.df = pd.read_csv(self.input_path, dtype=RAW_DTYPES)
+            print(f"Loaded {len(self.df)} reviews")
+            self.stats['original_count'] = len(self.df)
+            return True
+        except Exception as e:
+            print(f"ERROR loading file: {e}")
+            return False
+
+    # -----------------------------------------------------------
+    # REMOVE DUPLICATES
+    # -----------------------------------------------------------
+    def remove_duplicates(self):
+        self.log("\n[1/5] Removing duplicate reviews...")
+
+        before = len(self.df)
+        self.df = self.df.drop_duplicates(subset=['review_id', 'review_text'])
+        removed = before - len(self.df)
+
+        self.log(f"Removed {removed} duplicate rows")
+        self.stats['duplicates_removed'] = removed
+
+    # -----------------------------------------------------------
+    # REMOVE AMHARIC TEXT
+    # -----------------------------------------------------------
+    def remove_amharic_text(self):
+        # process() folds this into clean_text; kept for standalone use
+        self.log("\nRemoving Amharic/Ethiopic text...")
+
+        self.df['review_text'] = (
+            self.df['review_text'].astype(TEXT_DTYPE)
+            .str.replace(AMHARIC_PATTERN, "", regex=True)
+        )
+        self.log("Amharic text removed")
+
+    # -----------------------------------------------------------
+    # MISSING VALUE CHECK
+    # -----------------------------------------------------------
+    def check_missing_data(self):
+        print("\n[2/5] Checking for missing data...")
+        self.report_missing(self.df.isnull().sum(), len(self.df))
+
+    def report_missing(self, missing, total):
+        missing_pct = (missing / total) * 100
+
+        print("\nMissing values:")
+        for col in missing.index:
+            if missing[col] > 0:
+                print(f"  {col}: {missing[col]} ({missing_pct[col]:.2f}%)")
+
+        critical_cols = ['review_text', 'rating', 'bank_name']
+        missing_critical = missing.reindex(critical_cols, fill_value=0)
+
+        if missing_critical.sum() > 0:
+            print("\nWARNING: Missing values in critical columns:")
+            print(missing_critical[missing_critical > 0])
+
+    # -----------------------------------------------------------
+    # HANDLE MISSING VALUES
+    # -----------------------------------------------------------
+    def handle_missing_values(self):
+        self.log("\n[3/5] Handling missing values...")
+
+        critical_cols = ['review_text', 'rating', 'bank_name']
+        before_count = len(self.df)
+
+        # Remove rows missing critical info
+        self.df = self.df.dropna(subset=critical_cols)
+        removed = before_count - len(self.df)
+
+        if removed > 0:
+            self.log(f"Removed {removed} rows with missing critical values")
+
+        # Fill non-critical columns
+        if 'user_name' in self.df.columns:
+            self.df['user_name'] = self.df['user_name'].fillna('Anonymous')
+
+        if 'thumbs_up' in self.df.columns:
+            self.df['thumbs_up'] = self.df['thumbs_up'].fillna(0)
+
+        self.stats['rows_removed_missing'] = removed
+        self.stats['count_after_missing'] = len(self.df)
+
+    # -----------------------------------------------------------
+    # NORMALIZE DATE
+    # -----------------------------------------------------------
+    def normalize_dates(self):
+        self.log("\n[4/5] Normalizing dates...")
+
+        try:
+            self.df['review_date'] = pd.to_datetime(self.df['review_date'])
+            self.df['review_date'] = self.df['review_date'].dt.strftime('%Y-%m-%d')
+
+            self.stats['date_min'] = self.df['review_date'].min()
+            self.stats['date_max'] = self.df['review_date'].max()
+            self.log(f"Date range: {self.stats['date_min']} to {self.stats['date_max']}")
+
+        except Exception as e:
+            self.log(f"WARNING: Error normalizing dates: {e}")
+
+    # -----------------------------------------------------------
+    # CLEAN REVIEW TEXT
+    # -----------------------------------------------------------
+    def clean_text(self):
+        # One vectorized pass: Amharic removal, whitespace collapse, trim.
+        # Amharic removal never creates or fills missing values, so doing it
+        # here instead of before the missing-value steps gives the same rows.
+        self.log("\n[5/5] Cleaning review text (Amharic script, whitespace)...")
+
+        before_count = len(self.df)
+
+        self.df['review_text'] = clean_text_column(self.df['review_text']).fillna('')
+        self.df = self.df[self.df['review_text'].str.len() > 0]
+
+        removed = before_count - len(self.df)
+
+        if removed > 0:
+            self.log(f"Removed {removed} empty reviews")
+
+        # Add text length
+        self.df['text_length'] = self.df['review_text'].str.len()
+
+        self.stats['empty_reviews_removed'] = removed
+
+    # -----------------------------------------------------------
+    # TAG NEAR DUPLICATES
+    # -----------------------------------------------------------
+    def tag_near_duplicates(self):
+        # MinHash/LSH clustering of copy-pasted and spam-like reviews.
+        # Rows are kept; dup_cluster_id is the id of the first review of
+        # the cluster (a review's own running id if it has no match).
+        self.log(f"\nTagging near-duplicate reviews (similarity >= {self.near_dup_threshold})...")
+
+        if self.dup_index is None:
+            self.dup_index = NearDuplicateIndex(
+                threshold=self.near_dup_threshold, window=self.near_dup_window
+            )
+
+        first_id = self.dup_index.size
+        cluster_ids = self.dup_index.add(self.df['review_text'])
+        self.df['dup_cluster_id'] = cluster_ids
+
+        own_ids = np.arange(first_id, first_id + len(cluster_ids))
+        near_dups = int((cluster_ids != own_ids).sum())
+
+        self.log(f"Found {near_dups} near-duplicate reviews")
+        self.stats['near_duplicates'] = near_dups
+
+    # -----------------------------------------------------------
+    # FINAL CLEAN OUTPUT
+    # -----------------------------------------------------------
+    def prepare_final_output(self):
+        self.log("\nPreparing final dataset...")
+
+        output_columns = [
+            'review_id', 'review_text', 'rating', 'review_date',
+            'bank_code', 'bank_name',
+            'user_name', 'thumbs_up',
+            'text_length', 'dup_cluster_id', 'source'
+        ]
+
+        # Keep only columns that exist
+        output_columns = [c for c in output_columns if c in self.df.columns]
+
+        self.df = self.df[output_columns]
+        self.df = self.df.sort_values(['bank_code', 'review_date'], ascending=[True, False])
+        self.df = self.df.reset_index(drop=True)
+
+        self.log(f"Final dataset: {len(self.df)} reviews")
+
+    # -----------------------------------------------------------
+    # TOKENIZE ONCE FOR LATER STAGES
+    # -----------------------------------------------------------
+    def tokenize(self):
+        self.log("\nTokenizing reviews for later stages...")
+
+        self.tokens = TokenStore.from_texts(self.df['review_text'], self.df['review_id'])
+        self.log(f"{len(self.tokens.ids)} tokens, vocabulary of {len(self.tokens.vocabulary)}")
+
+    # -----------------------------------------------------------
+    # SAVE OUTPUT
+    # -----------------------------------------------------------
+    def save_data(self):
+        print("\nSaving processed data...")
+
+        try:
+            os.makedirs(os.path.dirname(self.output_path), exist_ok=True)
+            saved_path = write_dataset(self.df, self.output_path)
+            print(f"Data saved to: {saved_path}")
+            if self.tokens is not None:
+                self.tokens.save(self.tokens_path)
+                print(f"Tokens saved to: {self.tokens_path}")
+            self.stats['final_count'] = len(self.df)
+            return True
+        except Exception as e:
+            print(f"ERROR saving file: {e}")
+            return False
+
+    # -----------------------------------------------------------
+    # REPORT
+    # -----------------------------------------------------------
+    def generate_report(self):
+        print("\n" + "=" * 60)
+        print("PREPROCESSING REPORT")
+        print("=" * 60)
+
+        print(f"\nOriginal: {self.stats.get('original_count', 0)}")
+        print(f"Duplicates removed: {self.stats.get('duplicates_removed', 0)}")
+        print(f"Rows missing removed: {self.stats.get('rows_removed_missing', 0)}")
+        print(f"Empty removed: {self.stats.get('empty_reviews_removed', 0)}")
+        print(f"Near duplicates tagged: {self.stats.get('near_duplicates', 0)}")
+        print(f"Final cleaned count: {self.stats.get('final_count', 0)}")
+
+    # -----------------------------------------------------------
+    # CHUNKED (OUT-OF-CORE) MODE
+    # -----------------------------------------------------------
+    def iter_chunks(self):
+        """Stream the raw input in frames of at most self.chunksize rows"""
+        if os.path.isdir(self.input_path):
+            paths = RawReviewStore(self.input_path).partition_paths()
+        else:
+            paths = [self.input_path]
+
+        for path in paths:
+            if path.endswith(".jsonl"):
+                yield from pd.read_json(path, lines=True, dtype=RAW_DTYPES, chunksize=self.chunksize)
+            elif path.endswith(".parquet"):
+                import pyarrow.parquet as pq
+                for batch in pq.ParquetFile(path).iter_batches(batch_size=self.chunksize):
+                    yield batch.to_pandas()
+            else:
+                yield from pd.read_csv(path, dtype=RAW_DTYPES, chunksize=self.chunksize)
+
+    def process_chunked(self):
+        """
+        Same steps as process(), applied to one chunk at a time.
+
+        Duplicates are dropped across chunks through a HashSet of
+        (review_id, review_text) hashes, so peak memory is one chunk plus
+        8 bytes per distinct review. Each chunk's tokens are spilled to
+        disk (TokenStoreWriter), only the vocabulary stays in memory.
+        Stats match the in-memory path; rows are sorted within each chunk
+        only.
+        """
+        print("=" * 60)
+        print(f"STARTING DATA PREPROCESSING (chunks of {self.chunksize} rows)")
+        print("=" * 60)
+
+        totals = dict.fromkeys([
+            'original_count', 'duplicates_removed', 'rows_removed_missing',
+            'count_after_missing', 'empty_reviews_removed', 'near_duplicates',
+            'final_count'
+        ], 0)
+        seen = HashSet()
+        self.dup_index = None
+        missing = None
+        dedup_count = 0
+        date_min = date_max = None
+        saved_path = None
+
+        self.verbose = False
+        try:
+            os.makedirs(os.path.dirname(self.output_path), exist_ok=True)
+            writer = DatasetWriter(self.output_path)
+            token_writer = TokenStoreWriter(self.tokens_path)
+
+            for n, chunk in enumerate(self.iter_chunks(), start=1):
+                totals['original_count'] += len(chunk)
+
+                # Cross-chunk duplicate removal (keeps the first occurrence)
+                keys = pd.util.hash_pandas_object(
+                    chunk[['review_id', 'review_text']], index=False
+                ).to_numpy()
+                dup = pd.Series(keys).duplicated().to_numpy() | seen.contains(keys)
+                seen.add(keys[~dup])
+                self.df = chunk[~dup]
+                totals['duplicates_removed'] += int(dup.sum())
+
+                chunk_missing = self.df.isnull().sum()
+                missing = chunk_missing if missing is None else missing.add(chunk_missing, fill_value=0)
+                dedup_count += len(self.df)
+
+                self.stats = {}
+                self.handle_missing_values()
+                self.normalize_dates()
+                self.clean_text()
+                self.tag_near_duplicates()
+                self.prepare_final_output()
+                self.tokenize()
+                token_writer.write(self.tokens)
+                self.tokens = None
+
+                for key in ('rows_removed_missing', 'count_after_missing',
+                            'empty_reviews_removed', 'near_duplicates'):
+                    totals[key] += self.stats[key]
+                if len(self.df) and 'date_min' in self.stats:
+                    date_min = min(filter(None, [date_min, self.stats['date_min']]))
+                    date_max = max(filter(None, [date_max, self.stats['date_max']]))
+
+                writer.write(self.df)
+                totals['final_count'] += len(self.df)
+
+                print(f"  chunk {n}: {totals['original_count']} rows read, "
+                      f"{totals['final_count']} kept")
+
+            saved_path = writer.commit()
+            token_writer.commit()
+        except Exception as e:
+            print(f"ERROR during chunked preprocessing: {e}")
+            print("\n✗ Preprocessing failed!")
+            return False
+        finally:
+            self.verbose = True
+            self.df = None
+
+        if missing is not None and dedup_count:
+            print("\n[2/5] Missing data (after de-duplication)...")
+            self.report_missing(missing.astype(int), dedup_count)
+
+        self.stats = totals
+        if date_min is not None:
+            self.stats['date_min'], self.stats['date_max'] = date_min, date_max
+            print(f"\nDate range: {date_min} to {date_max}")
+
+        print(f"\nData saved to: {saved_path}")
+        print(f"Tokens saved to: {self.tokens_path}")
+        self.generate_report()
+        print("\n✓ Preprocessing completed successfully!")
+        return True
+
+    # -----------------------------------------------------------
+    # MASTER PROCESS
+    # -----------------------------------------------------------
+    def process(self):
+        if self.chunksize:
+            return self.process_chunked()
+
+        print("=" * 60)
+        print("STARTING DATA PREPROCESSING")
+        print("=" * 60)
+
+        if not self.load_data():
+            return False
+
+        self.dup_index = None
+        self.remove_duplicates()
+        self.check_missing_data()
+        self.handle_missing_values()
+        self.normalize_dates()
+        self.clean_text()
+        self.tag_near_duplicates()
+        self.prepare_final_output()
+        self.tokenize()
+
+        if self.save_data():
+            self.generate_report()
+            print("\n✓ Preprocessing completed successfully!")
+            return True
+
+        print("\n✗ Preprocessing failed!")
+        return False
+
+
+def main():
+    processor = ReviewPreprocessor()
+    processor.process()
+
+
+if __name__ == "__main__":
+    main()
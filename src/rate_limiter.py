@@ -0,0 +1,45 @@
+"""
+Rate limiting helpers for the Play Store scraper
+
+- RateLimiter: thread-safe token bucket shared by every scraper worker
+- backoff_delay: exponential backoff with full jitter for retries
+"""
+
+import random
+import threading
+import time
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` requests per second with bursts of `burst`"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """Block until `tokens` requests may be made"""
+        if not self.rate or self.rate <= 0:
+            return  # unlimited
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+
+                wait = (tokens - self._tokens) / self.rate
+
+            time.sleep(wait)
+
+
+def backoff_delay(attempt, base=1.0, cap=30.0):
+    """Seconds to wait before retry number `attempt` (0-based), full jitter"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
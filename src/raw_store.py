@@ -0,0 +1,140 @@
+"""
+Partitioned raw review store
+
+Scraped reviews are appended under
+
+    data/raw/reviews/bank_code=<code>/month=<YYYY-MM>/reviews.csv
+
+instead of overwriting one big CSV. The newest review seen for each bank
+(its high-water mark) is kept in _watermarks.json so incremental scrapes
+know where to stop paging.
+
+A review is stored once: appending a review_id that a partition already
+holds rewrites that partition with the new row in place of the old one.
+A review whose date moved to another month (an edit) is deduplicated when
+the store is read.
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import glob
+import json
+
+import pandas as pd
+
+from config import DATA_PATHS
+
+
+class RawReviewStore:
+    """Raw review store partitioned by bank and month, one row per review_id"""
+
+    def __init__(self, root=None):
+        self.root = root or DATA_PATHS["raw_store"]
+        self.watermark_path = os.path.join(self.root, "_watermarks.json")
+
+    # -----------------------------------------------------------
+    # HIGH-WATER MARKS
+    # -----------------------------------------------------------
+    def load_watermarks(self):
+        if not os.path.exists(self.watermark_path):
+            return {}
+        with open(self.watermark_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def get_watermark(self, bank_code):
+        """Return {"review_date", "review_id"} of the newest stored review, or None"""
+        return self.load_watermarks().get(bank_code)
+
+    def _save_watermarks(self, watermarks):
+        tmp_path = self.watermark_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(watermarks, f, indent=2)
+        os.replace(tmp_path, self.watermark_path)
+
+    # -----------------------------------------------------------
+    # WRITE
+    # -----------------------------------------------------------
+    def append(self, df, update_watermarks=True):
+        """
+        Append new raw reviews to their partitions. Rows whose review_id
+        is already stored in the partition replace the stored row; within
+        df the newest row of a review wins.
+
+        With update_watermarks=False the caller is streaming chunks of a
+        crawl and advances the watermarks itself once the crawl succeeded,
+        otherwise a crash halfway could leave a gap behind the watermark.
+        """
+        if df.empty:
+            return 0
+
+        os.makedirs(self.root, exist_ok=True)
+
+        dates = pd.to_datetime(df["review_date"])
+        df = df.loc[dates.sort_values(kind="stable").index].drop_duplicates("review_id", keep="last")
+        dates = dates[df.index]
+        months = dates.dt.strftime("%Y-%m")
+
+        for (bank_code, month), part in df.groupby([df["bank_code"], months]):
+            part_dir = os.path.join(self.root, f"bank_code={bank_code}", f"month={month}")
+            os.makedirs(part_dir, exist_ok=True)
+
+            path = os.path.join(part_dir, "reviews.csv")
+            if os.path.exists(path):
+                stored = pd.read_csv(path, dtype={"review_id": str})
+                replaced = stored["review_id"].isin(part["review_id"].astype(str))
+                if replaced.any():
+                    tmp_path = path + ".tmp"
+                    pd.concat([stored[~replaced], part], ignore_index=True).to_csv(tmp_path, index=False)
+                    os.replace(tmp_path, path)
+                    continue
+            part.to_csv(path, mode="a", header=not os.path.exists(path), index=False)
+
+        # Data is on disk, now move each bank's watermark forward
+        if update_watermarks:
+            ordered = df.assign(_date=dates).sort_values("_date", ascending=False)
+            newest = {
+                bank_code: {
+                    "review_date": group["_date"].iloc[0].isoformat(),
+                    "review_id": group["review_id"].iloc[0],
+                }
+                for bank_code, group in ordered.groupby("bank_code", sort=False)
+            }
+            self.advance_watermarks(newest)
+
+        return len(df)
+
+    def advance_watermarks(self, newest):
+        """Merge {bank_code: {"review_date", "review_id"}}, keeping the newer mark"""
+        watermarks = self.load_watermarks()
+
+        for bank_code, mark in newest.items():
+            current = watermarks.get(bank_code)
+            if current is None or pd.Timestamp(mark["review_date"]) >= pd.Timestamp(current["review_date"]):
+                watermarks[bank_code] = mark
+
+        os.makedirs(self.root, exist_ok=True)
+        self._save_watermarks(watermarks)
+
+    # -----------------------------------------------------------
+    # READ
+    # -----------------------------------------------------------
+    def partition_paths(self, bank_codes=None):
+        paths = sorted(glob.glob(os.path.join(self.root, "bank_code=*", "month=*", "reviews.csv")))
+        if bank_codes is not None:
+            wanted = {f"bank_code={code}" for code in bank_codes}
+            paths = [p for p in paths if p.split(os.sep)[-3] in wanted]
+        return paths
+
+    def read(self, bank_codes=None):
+        """
+        Load the stored reviews (optionally only some banks) as one
+        DataFrame, keeping the newest row of a review found in two months
+        """
+        paths = self.partition_paths(bank_codes)
+        if not paths:
+            return pd.DataFrame()
+        df = pd.concat((pd.read_csv(p, dtype={"review_id": str}) for p in paths), ignore_index=True)
+        newest = pd.to_datetime(df["review_date"]).sort_values(kind="stable").index
+        return df.loc[newest].drop_duplicates("review_id", keep="last").sort_index(ignore_index=True)
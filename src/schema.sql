@@ -1,21 +1,58 @@
--- schema.sql
-
-DROP TABLE IF EXISTS reviews CASCADE;
-DROP TABLE IF EXISTS banks CASCADE;
-
-CREATE TABLE banks (
-    bank_id SERIAL PRIMARY KEY,
-    bank_name TEXT NOT NULL,
-    bank_code TEXT UNIQUE NOT NULL
-);
-
-CREATE TABLE reviews (
-    review_id TEXT PRIMARY KEY,
-    bank_id INTEGER REFERENCES banks(bank_id),
-    review_text TEXT,
-    rating INTEGER,
-    review_date DATE,
-    sentiment_label TEXT,
-    sentiment_score FLOAT,
-    source TEXT
-);
+-- schema.sql
+
+DROP TABLE IF EXISTS bank_daily_stats CASCADE;
+DROP TABLE IF EXISTS reviews CASCADE;
+DROP TABLE IF EXISTS banks CASCADE;
+
+CREATE TABLE banks (
+    bank_id SERIAL PRIMARY KEY,
+    bank_name TEXT NOT NULL,
+    bank_code TEXT UNIQUE NOT NULL
+);
+
+-- Range-partitioned by review_date (one partition per year). The partition
+-- key has to be part of the primary key, so review_date is NOT NULL and
+-- the loader deletes the old row when a review's date changes.
+CREATE TABLE reviews (
+    review_id TEXT NOT NULL,
+    bank_id INTEGER REFERENCES banks(bank_id),
+    review_text TEXT,
+    rating INTEGER,
+    review_date DATE NOT NULL,
+    sentiment_label TEXT,
+    sentiment_score FLOAT,
+    source TEXT,
+    content_hash TEXT,          -- md5 of the loaded fields, see insert_reviews.py
+    PRIMARY KEY (review_id, review_date)
+) PARTITION BY RANGE (review_date);
+
+DO $$
+BEGIN
+    FOR year IN 2015..2030 LOOP
+        EXECUTE format(
+            'CREATE TABLE reviews_y%s PARTITION OF reviews FOR VALUES FROM (%L) TO (%L)',
+            year, make_date(year, 1, 1), make_date(year + 1, 1, 1)
+        );
+    END LOOP;
+END $$;
+
+CREATE TABLE reviews_default PARTITION OF reviews DEFAULT;
+
+-- Created on the parent, so every partition gets them. Lookups by
+-- review_id alone use the primary key, which leads with it.
+CREATE INDEX idx_reviews_bank_date ON reviews (bank_id, review_date);
+CREATE INDEX idx_reviews_sentiment_label ON reviews (sentiment_label);
+
+-- Per-bank, per-day aggregates, refreshed by the loader for the days it touches
+CREATE TABLE bank_daily_stats (
+    bank_id INTEGER NOT NULL REFERENCES banks(bank_id),
+    review_date DATE NOT NULL,
+    review_count INTEGER NOT NULL,
+    rating_count INTEGER NOT NULL,          -- reviews with a rating
+    rating_sum BIGINT NOT NULL,
+    positive_count INTEGER NOT NULL,
+    neutral_count INTEGER NOT NULL,
+    negative_count INTEGER NOT NULL,
+    sentiment_score_sum FLOAT NOT NULL,
+    PRIMARY KEY (bank_id, review_date)
+);
@@ -1,148 +1,438 @@
-"""
-Google Play Store Review Scraper
-Task 1: Data Collection
-
-Scrapes 500+ reviews from Google Play Store for:
-- CBE
-- BOA
-- Dashen
-"""
-
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from google_play_scraper import reviews, Sort, app
-import pandas as pd
-import time
-from tqdm import tqdm
-from datetime import datetime
-
-from config import APP_IDS, BANK_NAMES, SCRAPING_CONFIG, DATA_PATHS
-
-
-class PlayStoreScraper:
-    """Scraper class for Google Play Store reviews"""
-
-    def __init__(self):
-        self.app_ids = APP_IDS
-        self.bank_names = BANK_NAMES
-        self.reviews_per_bank = SCRAPING_CONFIG["reviews_per_bank"]
-        self.lang = SCRAPING_CONFIG["lang"]
-        self.country = SCRAPING_CONFIG["country"]
-        self.max_retries = SCRAPING_CONFIG["max_retries"]
-
-    # ---------------------------------------------------------
-    def get_app_info(self, app_id):
-        """Fetch app summary info"""
-        try:
-            info = app(app_id, lang=self.lang, country=self.country)
-            return {
-                'app_id': app_id,
-                "title": info.get("title", ""),
-                "score": info.get("score", 0),
-                "ratings": info.get("ratings", 0),
-                "reviews": info.get("reviews", 0),
-                "installs": info.get("installs", "N/A")
-            }
-        except Exception as e:
-            print(f"Error fetching app info for {app_id}: {e}")
-            return None
-
-    # ---------------------------------------------------------
-    def scrape_reviews(self, app_id):
-        """Scrape reviews using google-play-scraper"""
-        print(f"\nScraping reviews for {app_id}...")
-
-        for attempt in range(self.max_retries):
-            try:
-                result, _ = reviews(
-                    app_id,
-                    lang=self.lang,
-                    country=self.country,
-                    sort=Sort.NEWEST,
-                    count=self.reviews_per_bank,
-                    filter_score_with=None
-                )
-                print(f"✓ Scraped {len(result)} reviews")
-                return result
-            except Exception as e:
-                print(f"Attempt {attempt+1} failed: {e}")
-                if attempt < self.max_retries - 1:
-                    time.sleep(3)
-                else:
-                    print("❌ Failed after max retries.")
-                    return []
-
-    # ---------------------------------------------------------
-    def process_reviews(self, raw_reviews, bank_code):
-        """Clean & format scraped review dicts"""
-        processed = []
-        for r in raw_reviews:
-            processed.append({
-                "review_id": r.get("reviewId"),
-                "review_text": r.get("content", ""),
-                "rating": r.get("score"),
-                "review_date": r.get("at", datetime.now()),
-                "user_name": r.get("userName", ""),
-                "thumbs_up": r.get("thumbsUpCount", 0),
-                "bank_code": bank_code,
-                "bank_name": self.bank_names[bank_code],
-                "source": "Google Play"
-            })
-        return processed
-
-    # ---------------------------------------------------------
-    def scrape_all_banks(self):
-        # Main method to scrape all banks
-
-        all_reviews = []
-        app_info_list = []
-
-        print("=" * 60)
-        print("Starting Google Play Review Scraper")
-        print("=" * 60)
-
-        for bank_code, app_id in tqdm(self.app_ids.items(), desc="Banks"):
-
-            # Get app info
-            info = self.get_app_info(app_id)
-            if info:
-                info["bank_code"] = bank_code
-                info["bank_name"] = self.bank_names[bank_code]
-                info['app_id'] = app_id 
-                app_info_list.append(info)
-
-            # Scrape reviews
-            raw = self.scrape_reviews(app_id)
-            processed = self.process_reviews(raw, bank_code)
-            all_reviews.extend(processed)
-
-            time.sleep(2)
-
-        # Save review CSV
-        os.makedirs(DATA_PATHS["raw"], exist_ok=True)
-        df = pd.DataFrame(all_reviews)
-        df.to_csv(DATA_PATHS["raw_reviews"], index=False)
-
-        print("\n✓ Scraping complete!")
-        print(f"Total reviews collected: {len(df)}")
-        print(f"Saved to: {DATA_PATHS['raw_reviews']}")
-
-        # Save app info CSV
-        if app_info_list:
-            app_info_df = pd.DataFrame(app_info_list)
-            app_info_df.to_csv(f"{DATA_PATHS['raw']}/app_info.csv", index=False)
-            print(f"\nApp information saved to {DATA_PATHS['raw']}/app_info.csv")
-
-        return df
-
-
-# ---------------------------------------------------------
-def main():
-    scraper = PlayStoreScraper()
-    return scraper.scrape_all_banks()
-
-
-if __name__ == "__main__":
-    df = main()
+"""
+Google Play Store Review Scraper
+Task 1: Data Collection
+
+Scrapes 500+ reviews from Google Play Store for:
+- CBE
+- BOA
+- Dashen
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google_play_scraper import reviews, Sort, app
+from google_play_scraper.constants.element import ElementSpecs
+from google_play_scraper.constants.request import Formats
+from google_play_scraper.features.reviews import _fetch_review_items, MAX_COUNT_EACH_FETCH
+import pandas as pd
+import json
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tqdm import tqdm
+from datetime import datetime
+
+from config import APP_IDS, BANK_NAMES, SCRAPING_CONFIG, DATA_PATHS
+from rate_limiter import RateLimiter, backoff_delay
+from raw_store import RawReviewStore
+from sinks import StoreSink, open_sink
+
+
+class ScrapeCheckpoint:
+    """On-disk checkpoint of one app's paginated crawl.
+
+    Every fetched page is written to its own JSON file, followed by a small
+    state file holding the continuation token for the next page. A killed
+    run can therefore replay the saved pages and carry on from the token.
+    """
+
+    DATE_FIELDS = ("at", "repliedAt")
+
+    def __init__(self, root, app_id):
+        self.path = os.path.join(root, app_id)
+        self.state_path = os.path.join(self.path, "state.json")
+
+    # ---------------------------------------------------------
+    def load_state(self):
+        if not os.path.exists(self.state_path):
+            return {"token": None, "pages": 0, "reviews": 0, "done": False}
+        with open(self.state_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    # ---------------------------------------------------------
+    def _page_path(self, number):
+        return os.path.join(self.path, f"page_{number:05d}.json")
+
+    @staticmethod
+    def _write_json(path, obj):
+        # write-then-rename so a crash never leaves a half written file
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(obj, f, ensure_ascii=False, default=lambda v: v.isoformat())
+        os.replace(tmp_path, path)
+
+    # ---------------------------------------------------------
+    def save_page(self, page, token, state):
+        """Persist a fetched page, then advance the state to `token`"""
+        os.makedirs(self.path, exist_ok=True)
+        number = state["pages"] + 1
+        self._write_json(self._page_path(number), page)
+
+        state = {
+            "token": token,
+            "pages": number,
+            "reviews": state["reviews"] + len(page),
+            "done": token is None,
+        }
+        self._write_json(self.state_path, state)
+        return state
+
+    # ---------------------------------------------------------
+    def iter_pages(self, state):
+        """Replay the pages saved so far"""
+        for number in range(1, state["pages"] + 1):
+            with open(self._page_path(number), encoding="utf-8") as f:
+                page = json.load(f)
+            for r in page:
+                for field in self.DATE_FIELDS:
+                    if isinstance(r.get(field), str):
+                        r[field] = datetime.fromisoformat(r[field])
+            yield page
+
+    # ---------------------------------------------------------
+    def mark_done(self, state):
+        state = dict(state, done=True)
+        self._write_json(self.state_path, state)
+        return state
+
+    def clear(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class PlayStoreScraper:
+    """Scraper class for Google Play Store reviews"""
+
+    def __init__(self, fetch_fn=None, checkpoint_dir=None, rate_limiter=None):
+        self.app_ids = APP_IDS
+        self.bank_names = BANK_NAMES
+        self.reviews_per_bank = SCRAPING_CONFIG["reviews_per_bank"]
+        self.page_size = SCRAPING_CONFIG["page_size"]
+        self.lang = SCRAPING_CONFIG["lang"]
+        self.country = SCRAPING_CONFIG["country"]
+        self.max_retries = SCRAPING_CONFIG["max_retries"]
+        self.max_workers = SCRAPING_CONFIG["max_workers"]
+        self.output_format = SCRAPING_CONFIG["output_format"]
+        self.chunk_size = SCRAPING_CONFIG["chunk_size"]
+        self.backoff_base = SCRAPING_CONFIG["backoff_base"]
+        self.backoff_max = SCRAPING_CONFIG["backoff_max"]
+
+        # One bucket shared by every worker thread, so the request rate
+        # stays within budget no matter how many apps are scraped at once
+        self.rate_limiter = rate_limiter or RateLimiter(
+            SCRAPING_CONFIG["requests_per_second"], SCRAPING_CONFIG["burst"]
+        )
+
+        # fetch_fn(app_id, count, token) -> (page, next_token)
+        # tokens are plain strings; None as next_token means no more pages
+        self.fetch_fn = fetch_fn or self.fetch_review_page
+        self.checkpoint_dir = checkpoint_dir or DATA_PATHS["scrape_checkpoints"]
+
+    # ---------------------------------------------------------
+    def _call_with_retries(self, fn, *args, **kwargs):
+        """Call a network function under the rate limiter, retrying with backoff"""
+        for attempt in range(self.max_retries):
+            self.rate_limiter.acquire()
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                print(f"Attempt {attempt+1} failed: {e}")
+                if attempt < self.max_retries - 1:
+                    time.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_max))
+                else:
+                    raise
+
+    # ---------------------------------------------------------
+    def get_app_info(self, app_id):
+        """Fetch app summary info"""
+        try:
+            info = self._call_with_retries(app, app_id, lang=self.lang, country=self.country)
+            return {
+                'app_id': app_id,
+                "title": info.get("title", ""),
+                "score": info.get("score", 0),
+                "ratings": info.get("ratings", 0),
+                "reviews": info.get("reviews", 0),
+                "installs": info.get("installs", "N/A")
+            }
+        except Exception as e:
+            print(f"Error fetching app info for {app_id}: {e}")
+            return None
+
+    # ---------------------------------------------------------
+    def scrape_reviews(self, app_id):
+        """Scrape reviews using google-play-scraper"""
+        print(f"\nScraping reviews for {app_id}...")
+
+        try:
+            result, _ = self._call_with_retries(
+                reviews,
+                app_id,
+                lang=self.lang,
+                country=self.country,
+                sort=Sort.NEWEST,
+                count=self.reviews_per_bank,
+                filter_score_with=None
+            )
+        except Exception:
+            print("❌ Failed after max retries.")
+            return []
+
+        print(f"✓ Scraped {len(result)} reviews")
+        return result
+
+    # ---------------------------------------------------------
+    def fetch_review_page(self, app_id, count, token):
+        """
+        Fetch one page of newest reviews from Google Play with a single request.
+
+        reviews() catches request errors and returns the partial result with
+        no token, which looks exactly like the end of the stream. Fetching the
+        page directly lets failures raise, so they are retried and a crawl is
+        never checkpointed as finished because of a network error.
+        """
+        url = Formats.Reviews.build(lang=self.lang, country=self.country)
+        items, next_token = _fetch_review_items(
+            url, app_id, Sort.NEWEST.value, min(count, MAX_COUNT_EACH_FETCH), None, None, token
+        )
+        page = [
+            {k: spec.extract_content(item) for k, spec in ElementSpecs.Review.items()}
+            for item in items
+        ]
+        if isinstance(next_token, list):    # the last page carries no string token
+            next_token = None
+        return page, next_token
+
+    # ---------------------------------------------------------
+    @staticmethod
+    def _cut_page(page, stop_at):
+        """Truncate a page at the first review matching stop_at"""
+        if stop_at is not None:
+            for i, r in enumerate(page):
+                if stop_at(r):
+                    return page[:i], True
+        return page, False
+
+    # ---------------------------------------------------------
+    def iter_review_pages(self, app_id, max_reviews=None, page_size=None, stop_at=None):
+        """
+        Walk the continuation token page by page, yielding raw review pages.
+
+        Pages already stored in the app's checkpoint are replayed first, then
+        fetching resumes from the saved token. Stops when the token runs out,
+        `max_reviews` (None = no limit) is reached, or a review matches the
+        `stop_at(raw_review)` predicate (used to stop at already known reviews).
+        """
+        page_size = page_size or self.page_size
+        checkpoint = ScrapeCheckpoint(self.checkpoint_dir, app_id)
+        state = checkpoint.load_state()
+
+        if state["pages"]:
+            print(f"Resuming {app_id} from checkpoint "
+                  f"({state['pages']} pages, {state['reviews']} reviews)")
+
+        collected = 0
+        for page in checkpoint.iter_pages(state):
+            page, stopped = self._cut_page(page, stop_at)
+            if max_reviews is not None and collected + len(page) > max_reviews:
+                page = page[:max_reviews - collected]
+            collected += len(page)
+            yield page
+            if stopped or (max_reviews is not None and collected >= max_reviews):
+                return
+
+        while not state["done"]:
+            count = page_size
+            if max_reviews is not None:
+                count = min(count, max_reviews - collected)
+                if count <= 0:
+                    break
+
+            page, token = self._call_with_retries(self.fetch_fn, app_id, count, state["token"])
+            if not page:
+                checkpoint.mark_done(state)
+                break
+
+            state = checkpoint.save_page(page, token, state)
+            page, stopped = self._cut_page(page, stop_at)
+            collected += len(page)
+            yield page
+            if stopped:
+                break
+
+    # ---------------------------------------------------------
+    def clear_checkpoint(self, app_id):
+        ScrapeCheckpoint(self.checkpoint_dir, app_id).clear()
+
+    # ---------------------------------------------------------
+    def process_reviews(self, raw_reviews, bank_code):
+        """Clean & format scraped review dicts (lazily, one row at a time)"""
+        for r in raw_reviews:
+            yield {
+                "review_id": r.get("reviewId"),
+                "review_text": r.get("content", ""),
+                "rating": r.get("score"),
+                "review_date": r.get("at", datetime.now()),
+                "user_name": r.get("userName", ""),
+                "thumbs_up": r.get("thumbsUpCount", 0),
+                "bank_code": bank_code,
+                "bank_name": self.bank_names[bank_code],
+                "source": "Google Play"
+            }
+
+    # ---------------------------------------------------------
+    @staticmethod
+    def known_review_check(watermark):
+        """
+        Build a stop_at predicate from a bank's high-water mark.
+
+        Reviews arrive newest first, so paging can stop at the stored newest
+        review_id or at the first review older than its review_date.
+        """
+        if not watermark:
+            return None
+
+        known_id = watermark["review_id"]
+        known_date = datetime.fromisoformat(watermark["review_date"])
+
+        def is_known(r):
+            at = r.get("at")
+            return r.get("reviewId") == known_id or (at is not None and at < known_date)
+
+        return is_known
+
+    # ---------------------------------------------------------
+    def scrape_bank(self, bank_code, app_id, sink, paginated=False, max_reviews=None,
+                    watermark=None):
+        """
+        Fetch app info and reviews for one bank (runs inside a worker thread).
+
+        Reviews are streamed into `sink` page by page. Returns the app info,
+        the number of reviews written and the newest review seen (the bank's
+        next high-water mark).
+        """
+        info = self.get_app_info(app_id)
+        if info:
+            info["bank_code"] = bank_code
+            info["bank_name"] = self.bank_names[bank_code]
+            info['app_id'] = app_id
+
+        if paginated:
+            print(f"\nScraping reviews for {app_id} (paginated)...")
+            pages = self.iter_review_pages(
+                app_id, max_reviews=max_reviews, stop_at=self.known_review_check(watermark)
+            )
+        else:
+            pages = [self.scrape_reviews(app_id)]
+
+        count = 0
+        newest = None
+        for page in pages:
+            if page and newest is None:
+                # Sort.NEWEST: the first review seen is the newest one
+                newest = {
+                    "review_date": page[0]["at"].isoformat(),
+                    "review_id": page[0]["reviewId"],
+                }
+            sink.write(self.process_reviews(page, bank_code))
+            count += len(page)
+
+        if paginated:
+            print(f"✓ Scraped {count} reviews")
+
+        return info, count, newest
+
+    def raw_output_path(self):
+        base, _ = os.path.splitext(DATA_PATHS["raw_reviews"])
+        return f"{base}.{self.output_format}"
+
+    # ---------------------------------------------------------
+    def scrape_all_banks(self, paginated=False, max_reviews=None, max_workers=None,
+                         incremental=False):
+        # Main method to scrape all banks
+        # paginated=True walks the continuation token with checkpoints,
+        # fetching up to max_reviews per bank (None = everything).
+        # incremental=True (implies paginated) only fetches reviews newer than
+        # each bank's high-water mark and appends them to the RawReviewStore.
+        # Banks are scraped concurrently by max_workers threads which all
+        # share self.rate_limiter.
+        # Reviews are streamed to disk in chunks of self.chunk_size while
+        # scraping; a full run writes to <raw_reviews>.partial and renames it
+        # once every bank succeeded.
+
+        max_workers = max_workers or self.max_workers
+        paginated = paginated or incremental
+        store = RawReviewStore() if incremental else None
+        watermarks = store.load_watermarks() if incremental else {}
+        results = {}
+        failed = {}
+
+        os.makedirs(DATA_PATHS["raw"], exist_ok=True)
+        if incremental:
+            saved_to = store.root
+            sink = StoreSink(store, chunk_size=self.chunk_size)
+        else:
+            saved_to = self.raw_output_path()
+            sink = open_sink(saved_to + ".partial", self.output_format, self.chunk_size)
+
+        print("=" * 60)
+        print("Starting Google Play Review Scraper")
+        print("=" * 60)
+
+        with sink, ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                pool.submit(self.scrape_bank, bank_code, app_id, sink, paginated,
+                            max_reviews, watermarks.get(bank_code)): bank_code
+                for bank_code, app_id in self.app_ids.items()
+            }
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Banks"):
+                bank_code = futures[future]
+                try:
+                    results[bank_code] = future.result()
+                except Exception as e:
+                    failed[bank_code] = e
+
+        if failed:
+            # Rows fetched so far are on disk and checkpoints are kept,
+            # so a re-run resumes every bank
+            raise RuntimeError(f"Scraping failed for {sorted(failed)}: {failed}")
+
+        if incremental:
+            store.advance_watermarks({
+                bank_code: newest for bank_code, (_, _, newest) in results.items() if newest
+            })
+        elif os.path.exists(saved_to + ".partial"):
+            os.replace(saved_to + ".partial", saved_to)
+
+        print("\n✓ Scraping complete!")
+        print(f"{'New' if incremental else 'Total'} reviews collected: {sink.rows_written}")
+        print(f"Saved to: {saved_to}")
+
+        # Output is safely on disk, the checkpoints are no longer needed
+        if paginated:
+            for app_id in self.app_ids.values():
+                self.clear_checkpoint(app_id)
+
+        # Save app info CSV (keep APP_IDS order regardless of completion order)
+        app_info_list = [results[code][0] for code in self.app_ids if results[code][0]]
+        if app_info_list:
+            app_info_df = pd.DataFrame(app_info_list)
+            app_info_df.to_csv(f"{DATA_PATHS['raw']}/app_info.csv", index=False)
+            print(f"\nApp information saved to {DATA_PATHS['raw']}/app_info.csv")
+
+        return sink.rows_written
+
+
+# ---------------------------------------------------------
+def main():
+    scraper = PlayStoreScraper()
+    mode = SCRAPING_CONFIG["mode"]
+    return scraper.scrape_all_banks(
+        paginated=mode != "full",
+        incremental=mode == "incremental"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,81 +1,301 @@
-"""
-Sentiment Analysis using VADER
-Task 2: Sentiment Scoring
-
-This script:
-- Loads processed reviews
-- Applies VADER sentiment scoring
-- Generates sentiment label (positive/neutral/negative)
-- Saves results to data/sentiment/sentiment_results.csv
-"""
-
-import os
-import sys
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-import pandas as pd
-from nltk.sentiment import SentimentIntensityAnalyzer
-from config import DATA_PATHS
-import nltk
-
-# download vader lexicon if not installed
-nltk.download('vader_lexicon')
-
-
-class SentimentAnalyzer:
-    def __init__(self):
-        self.input_path = DATA_PATHS["processed_reviews"]
-        self.output_path = "data/sentiment/sentiment_results.csv"
-        self.df = None
-        self.analyzer = SentimentIntensityAnalyzer()
-
-    def load_data(self):
-        print("Loading processed reviews...")
-        try:
-            self.df = pd.read_csv(self.input_path)
-            print(f"Loaded {len(self.df)} reviews.")
-            return True
-        except Exception as e:
-            print(f"Error: {e}")
-            return False
-
-    def apply_vader(self):
-        print("Applying VADER sentiment analysis...")
-
-        def analyze(text):
-            scores = self.analyzer.polarity_scores(text)
-            compound = scores["compound"]
-
-            if compound >= 0.05:
-                label = "positive"
-            elif compound <= -0.05:
-                label = "negative"
-            else:
-                label = "neutral"
-
-            return pd.Series([compound, label])
-
-        self.df[["sentiment_score", "sentiment_label"]] = self.df["review_text"].apply(analyze)
-        print("Sentiment scoring complete.")
-
-    def save_results(self):
-        os.makedirs("data/sentiment", exist_ok=True)
-        self.df.to_csv(self.output_path, index=False)
-        print(f"Sentiment results saved to {self.output_path}")
-
-    def process(self):
-        if not self.load_data():
-            return
-
-        self.apply_vader()
-        self.save_results()
-        print("✓ Sentiment analysis completed.")
-
-
-def main():
-    analyzer = SentimentAnalyzer()
-    analyzer.process()
-
-
-if __name__ == "__main__":
-    main()
+"""
+Sentiment Analysis using VADER
+Task 2: Sentiment Scoring
+
+This script:
+- Loads processed reviews
+- Applies VADER sentiment scoring
+- Generates sentiment label (positive/neutral/negative)
+- Saves results to data/sentiment/sentiment_results (Parquet or CSV, see storage.py)
+- Keeps the report aggregate cube (analytics.py) in step with the results
+- Feeds newly scored reviews to the streaming monitor (monitor.py)
+
+With DELTA_MODE=1 only reviews that are new or whose text changed since
+the last run are scored; the stored scores of all other reviews are kept.
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from config import DATA_PATHS, MONITOR_CONFIG, SENTIMENT_CONFIG
+from analytics import refresh_cube
+from delta import RowDelta, text_hash
+from monitor import update_monitor
+from sentiment_cache import SentimentCache
+from storage import dataset_exists, partition_keys, read_dataset, write_dataset
+
+# Worker processes are started from a fork server, not forked from this
+# process: the pipeline calls in here from threads, and forking a process
+# with other live threads can copy held locks into the child
+_MP_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else None
+)
+
+
+# -----------------------------------------------------------
+# LAZY ANALYZER
+# -----------------------------------------------------------
+# nltk is imported and the lexicon loaded on first use, never at import
+# time, and never from the network unless VADER_ALLOW_DOWNLOAD=1
+NLTK_VADER_RESOURCE = "sentiment/vader_lexicon.zip/vader_lexicon/vader_lexicon.txt"
+
+_analyzer = None
+_analyzer_lock = threading.Lock()
+
+
+def resolve_vader_lexicon():
+    """
+    Locate the VADER lexicon resource, looking in order at:
+    1. VADER_LEXICON_DIR, a local nltk data directory holding
+       sentiment/vader_lexicon.zip (or the unzipped folder)
+    2. the standard nltk data directories (NLTK_DATA, ~/nltk_data, ...)
+    3. a download, only when VADER_ALLOW_DOWNLOAD=1
+    """
+    import nltk
+
+    lexicon_dir = SENTIMENT_CONFIG["vader_lexicon_dir"]
+    if lexicon_dir:
+        if not os.path.isdir(lexicon_dir):
+            raise FileNotFoundError(f"VADER_LEXICON_DIR does not exist: {lexicon_dir}")
+        lexicon_dir = os.path.abspath(lexicon_dir)
+        if lexicon_dir not in nltk.data.path:
+            nltk.data.path.insert(0, lexicon_dir)
+
+    try:
+        nltk.data.find(NLTK_VADER_RESOURCE)
+        return NLTK_VADER_RESOURCE
+    except LookupError:
+        if not SENTIMENT_CONFIG["allow_download"]:
+            raise LookupError(
+                "VADER lexicon not found. Point VADER_LEXICON_DIR at a directory "
+                "containing sentiment/vader_lexicon.zip, install it into an nltk "
+                "data directory, or set VADER_ALLOW_DOWNLOAD=1."
+            )
+
+    nltk.download("vader_lexicon", quiet=True)
+    return NLTK_VADER_RESOURCE
+
+
+def get_vader_analyzer():
+    """Process-wide SentimentIntensityAnalyzer, built once on first use"""
+    global _analyzer
+    if _analyzer is None:
+        with _analyzer_lock:
+            if _analyzer is None:
+                from nltk.sentiment import SentimentIntensityAnalyzer
+                _analyzer = SentimentIntensityAnalyzer(lexicon_file=resolve_vader_lexicon())
+    return _analyzer
+
+
+# -----------------------------------------------------------
+# BATCHED SCORING ENGINE
+# -----------------------------------------------------------
+# Each pool worker builds its own analyzer once, in the initializer
+_worker_analyzer = None
+
+
+def _init_worker():
+    global _worker_analyzer
+    _worker_analyzer = get_vader_analyzer()
+
+
+def _score_batch(texts, analyzer=None):
+    analyzer = analyzer or _worker_analyzer
+    return np.fromiter(
+        (analyzer.polarity_scores(t)["compound"] for t in texts),
+        dtype=np.float64, count=len(texts)
+    )
+
+
+def label_scores(scores):
+    """positive (>= 0.05) / negative (<= -0.05) / neutral, as a NumPy array"""
+    return np.select(
+        [scores >= 0.05, scores <= -0.05],
+        ["positive", "negative"],
+        default="neutral"
+    )
+
+
+def score_texts(texts, analyzer=None, n_jobs=1, batch_size=2000):
+    """
+    VADER compound scores for a list of texts, as a float64 array.
+
+    With n_jobs > 1 the texts are split into batches of `batch_size` and
+    scored in a process pool, one SentimentIntensityAnalyzer per worker.
+    """
+    texts = list(texts)
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+
+    if n_jobs <= 1 or len(batches) <= 1:
+        analyzer = analyzer or get_vader_analyzer()
+        return np.concatenate([_score_batch(b, analyzer) for b in batches] or [np.empty(0)])
+
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, mp_context=_MP_CONTEXT) as pool:
+        return np.concatenate(list(pool.map(_score_batch, batches)))
+
+
+def analyzer_version(analyzer):
+    """Version tag for cache keys: nltk release + hash of the loaded lexicon"""
+    import nltk
+
+    lexicon_hash = hashlib.sha1(analyzer.lexicon_file.encode("utf-8")).hexdigest()[:12]
+    return f"vader-nltk{nltk.__version__}-{lexicon_hash}"
+
+
+class SentimentAnalyzer:
+    def __init__(self, n_jobs=None, batch_size=None, use_cache=None, delta=None):
+        self.input_path = DATA_PATHS["processed_reviews"]
+        self.output_path = "data/sentiment/sentiment_results.csv"
+        self.df = None
+        self.delta = SENTIMENT_CONFIG["delta"] if delta is None else delta
+        self.partitions = None  # result partitions to rewrite, None = all
+        self.changes = None     # (added, removed) rows of a delta run, for the cube
+        self.n_jobs = n_jobs or SENTIMENT_CONFIG["n_jobs"]
+        self.batch_size = batch_size or SENTIMENT_CONFIG["batch_size"]
+        self.use_cache = SENTIMENT_CONFIG["cache"] if use_cache is None else use_cache
+        self.cache = None   # opened on first score()
+
+    @property
+    def analyzer(self):
+        return get_vader_analyzer()
+
+    def open_cache(self):
+        if self.use_cache and self.cache is None:
+            self.cache = SentimentCache(
+                DATA_PATHS["sentiment_cache"],
+                version=analyzer_version(self.analyzer),
+                max_entries=SENTIMENT_CONFIG["cache_max_entries"]
+            )
+        return self.cache
+
+    def load_data(self):
+        print("Loading processed reviews...")
+        try:
+            self.df = read_dataset(self.input_path)
+            print(f"Loaded {len(self.df)} reviews.")
+            return True
+        except Exception as e:
+            print(f"Error: {e}")
+            return False
+
+    def score(self, texts):
+        """Compound scores for a sequence of texts, scoring only cache misses"""
+        texts = list(texts)
+        if self.open_cache() is None:
+            return score_texts(texts, self.analyzer, self.n_jobs, self.batch_size)
+
+        keys = [self.cache.key(t) for t in texts]
+        scores = self.cache.get_many(dict.fromkeys(keys))
+
+        # one text per missing key: identical texts are scored once
+        missing = {}
+        for k, t in zip(keys, texts):
+            if k not in scores:
+                missing.setdefault(k, t)
+
+        if missing:
+            new_scores = score_texts(list(missing.values()), self.analyzer, self.n_jobs, self.batch_size)
+            scores.update(zip(missing, new_scores))
+            self.cache.put_many(zip(missing, new_scores))
+
+        print(f"Cache hit rate: {self.cache.hit_rate:.1%} "
+              f"({self.cache.hits} hits, {len(missing)} new texts scored)")
+
+        return np.fromiter((scores[k] for k in keys), dtype=np.float64, count=len(keys))
+
+    def apply_vader(self):
+        print(f"Applying VADER sentiment analysis ({self.n_jobs} workers)...")
+
+        scores = self.score(self.df["review_text"].astype(str))
+
+        self.df["sentiment_score"] = scores
+        self.df["sentiment_label"] = label_scores(scores)
+        print("Sentiment scoring complete.")
+
+    # -----------------------------------------------------------
+    # DELTA MODE
+    # -----------------------------------------------------------
+    def load_previous(self):
+        """Results of the last run, or None when there are none usable"""
+        if not dataset_exists(self.output_path):
+            return None
+        previous = read_dataset(self.output_path)
+        if not {*self.df.columns, "sentiment_score", "sentiment_label"} <= set(previous.columns):
+            print("Stored results have other columns, scoring everything.")
+            return None
+        if not previous["review_id"].is_unique:
+            print("Stored results have duplicate review_ids, scoring everything.")
+            return None
+        return previous
+
+    def apply_vader_delta(self, previous):
+        """Score new and changed reviews only; copy the stored scores of the rest"""
+        delta = RowDelta(self.df["review_id"], text_hash(self.df["review_text"]),
+                         previous["review_id"], text_hash(previous["review_text"]))
+        print(f"Delta against stored results: {delta.summary()}")
+
+        scores = np.empty(len(self.df))
+        scores[delta.reused] = previous["sentiment_score"].to_numpy()[delta.source[delta.reused]]
+        if delta.pending.any():
+            print(f"Applying VADER sentiment analysis ({self.n_jobs} workers)...")
+            scores[delta.pending] = self.score(self.df["review_text"][delta.pending].astype(str))
+
+        self.df["sentiment_score"] = scores
+        self.df["sentiment_label"] = label_scores(scores)
+
+        # rewrite only the bank/month partitions a new, changed or removed row falls in
+        columns = [c for c in self.df.columns if c not in ("review_id", "review_text")]
+        changed = delta.changed(self.df, previous, columns)
+        replaced = pd.concat([previous.iloc[delta.source[changed & ~delta.new]], previous[delta.removed]])
+        self.changes = (self.df[changed], replaced)
+        self.partitions = partition_keys(self.df[changed]) | partition_keys(replaced)
+        print(f"Sentiment scoring complete ({len(self.partitions)} partitions to update).")
+
+    def save_results(self):
+        saved_path = write_dataset(self.df, self.output_path, partitions=self.partitions)
+        print(f"Sentiment results saved to {saved_path}")
+
+        added, removed = self.changes or (None, None)
+        cube = refresh_cube(self.df, added=added, removed=removed)
+        print(f"Aggregate cube updated ({len(cube)} cells)")
+
+    def update_monitor(self):
+        events = update_monitor(self.df)
+        print(f"Sentiment monitor: {len(events)} new events")
+        for event in events.to_dict("records"):
+            print(f"  ⚠ {event['bank_code']} {event['review_date'][:10]} {event['kind']}: "
+                  f"{event['value']} (baseline {event['baseline']})")
+
+    def process(self):
+        if not self.load_data():
+            return
+
+        previous = self.load_previous() if self.delta else None
+        if previous is not None:
+            self.apply_vader_delta(previous)
+        else:
+            self.apply_vader()
+        self.save_results()
+        if MONITOR_CONFIG["enabled"]:
+            self.update_monitor()
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+        print("✓ Sentiment analysis completed.")
+
+
+def main():
+    analyzer = SentimentAnalyzer()
+    analyzer.process()
+
+
+if __name__ == "__main__":
+    main()
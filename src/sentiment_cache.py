@@ -0,0 +1,109 @@
+"""
+Content-addressed cache of sentiment scores
+
+Scores are stored in a local SQLite file keyed by a hash of the
+normalized review text plus the analyzer/lexicon version, so unchanged
+and repeated texts ("good", "👍", ...) are only scored once. Changing the
+analyzer version simply stops old keys from matching.
+
+The cache is size-bounded: when it grows past max_entries the least
+recently used keys are evicted.
+"""
+
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import unicodedata
+
+
+def normalize_text(text):
+    """NFC + collapsed whitespace: VADER splits on whitespace, so scores are unchanged"""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+class SentimentCache:
+    """SQLite-backed {text hash: score} store with LRU eviction"""
+
+    # SQLite limits the number of bound parameters per statement
+    _QUERY_BATCH = 900
+
+    def __init__(self, path, version, max_entries=1_000_000):
+        self.path = path
+        self.version = version
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS scores (
+                key BLOB PRIMARY KEY,
+                score REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_scores_last_used ON scores(last_used)")
+        self.conn.commit()
+
+    # -----------------------------------------------------------
+    def key(self, text):
+        payload = f"{self.version}\x00{normalize_text(text)}".encode("utf-8")
+        return hashlib.blake2b(payload, digest_size=16).digest()
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    # -----------------------------------------------------------
+    def get_many(self, keys):
+        """Return {key: score} for the keys present, refreshing their last_used"""
+        keys = list(keys)
+        found = {}
+        for i in range(0, len(keys), self._QUERY_BATCH):
+            batch = keys[i:i + self._QUERY_BATCH]
+            rows = self.conn.execute(
+                f"SELECT key, score FROM scores WHERE key IN ({','.join('?' * len(batch))})",
+                batch
+            )
+            found.update(rows)
+
+        now = time.time()
+        self.conn.executemany(
+            "UPDATE scores SET last_used = ? WHERE key = ?",
+            ((now, k) for k in found)
+        )
+        self.conn.commit()
+
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        """Store (key, score) pairs, then evict if over max_entries"""
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO scores (key, score, last_used) VALUES (?, ?, ?)",
+            ((k, float(score), now) for k, score in items)
+        )
+        self.conn.commit()
+        self.evict()
+
+    def evict(self):
+        (count,) = self.conn.execute("SELECT COUNT(*) FROM scores").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self.conn.execute(
+                "DELETE FROM scores WHERE key IN "
+                "(SELECT key FROM scores ORDER BY last_used LIMIT ?)",
+                (excess,)
+            )
+            self.conn.commit()
+        return max(excess, 0)
+
+    def close(self):
+        self.conn.close()
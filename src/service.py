@@ -0,0 +1,302 @@
+"""
+Review scoring / query service
+
+A local HTTP service for support tooling:
+
+    POST /score              one review -> sentiment, rule themes, LDA topic
+    POST /score/batch        many reviews in one call
+    GET  /banks/aggregates   review counts, rating and sentiment per bank
+    GET  /banks/{code}/aggregates
+    GET  /health
+
+The VADER analyzer, the theme regexes and the latest saved topic models
+are loaded once at start-up. Concurrent /score requests are collected by
+a micro-batcher (up to max_batch reviews, or max_wait_ms after the first
+one) and scored together in a worker thread, so the event loop never
+blocks on scoring. Aggregates come from bank_daily_stats through the
+pooled session factory in db.py.
+
+    uvicorn service:app --app-dir src --port 8000
+    python src/service.py
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+import pandas as pd
+from fastapi import Depends, FastAPI, HTTPException
+from pydantic import BaseModel, Field
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from config import DATA_PATHS, SERVICE_CONFIG, THEME_LEXICON, DEFAULT_THEME
+from db import get_db, get_sessionmaker
+from sentiment_analysis import SentimentAnalyzer, label_scores
+from theme_extraction import tag_themes
+from topic_models import TopicInferencer
+
+
+# -----------------------------------------------------------
+# REQUEST / RESPONSE MODELS
+# -----------------------------------------------------------
+class Review(BaseModel):
+    text: str = Field(..., max_length=20000)
+    bank_code: Optional[str] = None     # needed for the bank's LDA topic
+
+
+class ReviewBatch(BaseModel):
+    reviews: List[Review] = Field(..., max_length=1000)
+
+
+class ScoredReview(BaseModel):
+    sentiment_score: float
+    sentiment_label: str
+    themes: List[str]
+    dominant_topic: Optional[int] = None
+    topic_probability: Optional[float] = None
+    topic_model_version: Optional[str] = None
+
+
+# -----------------------------------------------------------
+# SCORING
+# -----------------------------------------------------------
+class ReviewScorer:
+    """Sentiment, rule themes and topics for a batch of reviews, models loaded once"""
+
+    def __init__(self, model_dir=None):
+        # in-process scoring of short batches: no worker pool, no sqlite cache
+        self.analyzer = SentimentAnalyzer(n_jobs=1, use_cache=False)
+        self.analyzer.analyzer.polarity_scores("warm up")   # load the lexicon now
+        self.theme_labels = [theme["label"] for theme in THEME_LEXICON.values()]
+
+        try:
+            self.topics = TopicInferencer(model_dir or DATA_PATHS["topic_models"])
+        except FileNotFoundError:
+            self.topics = None      # no saved models yet: topics are left empty
+
+    def score_batch(self, reviews):
+        """reviews: list of Review; returns a list of ScoredReview dicts"""
+        texts = pd.Series([review.text for review in reviews])
+        scores = self.analyzer.score(texts)
+        labels = label_scores(scores)
+        hits = tag_themes(texts).to_numpy()
+
+        topics = None
+        if self.topics is not None:
+            df = pd.DataFrame({"review_text": texts,
+                               "bank_code": [review.bank_code for review in reviews]})
+            topics = self.topics.infer(df)
+
+        results = []
+        for i in range(len(reviews)):
+            themes = [label for label, hit in zip(self.theme_labels, hits[i]) if hit]
+            result = {
+                "sentiment_score": float(scores[i]),
+                "sentiment_label": str(labels[i]),
+                "themes": themes or [DEFAULT_THEME],
+            }
+            if topics is not None and not pd.isna(topics["dominant_topic"].iloc[i]):
+                topic = int(topics["dominant_topic"].iloc[i])
+                result.update({
+                    "dominant_topic": topic,
+                    "topic_probability": float(topics[f"topic_{topic}"].iloc[i]),
+                    "topic_model_version": topics["topic_model_version"].iloc[i],
+                })
+            results.append(result)
+        return results
+
+
+class MicroBatcher:
+    """
+    Groups concurrent single requests into batches: a batch is sent to
+    the handler once it holds max_batch items or max_wait_ms after its
+    first item arrived. The handler runs in one worker thread.
+    """
+
+    def __init__(self, handler, max_batch=64, max_wait_ms=5):
+        self.handler = handler
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scorer")
+        self.queue = None
+        self.task = None
+        self.batches = 0
+        self.items = 0
+
+    async def start(self):
+        self.queue = asyncio.Queue()
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.executor.shutdown(wait=True)
+
+    async def submit(self, item):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((item, future))
+        return await future
+
+    async def _collect(self):
+        batch = [await self.queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            items = [item for item, _ in batch]
+            try:
+                results = await loop.run_in_executor(self.executor, self.handler, items)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+# -----------------------------------------------------------
+# AGGREGATES
+# -----------------------------------------------------------
+AGGREGATES_SQL = """
+    SELECT b.bank_code, b.bank_name,
+           SUM(s.review_count) AS review_count,
+           CAST(SUM(s.rating_sum) AS FLOAT) / NULLIF(SUM(s.rating_count), 0) AS avg_rating,
+           SUM(s.sentiment_score_sum) / NULLIF(SUM(s.review_count), 0) AS avg_sentiment,
+           SUM(s.positive_count) AS positive_count,
+           SUM(s.neutral_count) AS neutral_count,
+           SUM(s.negative_count) AS negative_count,
+           MIN(s.review_date) AS first_review_date,
+           MAX(s.review_date) AS last_review_date
+    FROM bank_daily_stats s
+    JOIN banks b ON s.bank_id = b.bank_id
+    {where}
+    GROUP BY b.bank_code, b.bank_name
+    ORDER BY b.bank_code
+"""
+
+
+def database():
+    """get_db, answering 503 instead of 500 when no database is configured"""
+    try:
+        get_sessionmaker()
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    yield from get_db()
+
+
+def query_aggregates(db, bank_code=None, since=None):
+    conditions, params = [], {}
+    if bank_code is not None:
+        conditions.append("b.bank_code = :bank_code")
+        params["bank_code"] = bank_code
+    if since is not None:
+        conditions.append("s.review_date >= :since")
+        params["since"] = since
+    where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+
+    try:
+        rows = db.execute(text(AGGREGATES_SQL.format(where=where)), params).mappings().all()
+    except OperationalError as e:
+        raise HTTPException(status_code=503, detail=f"Database unavailable: {e.orig}")
+    return [
+        {key: float(value) if key.startswith("avg_") and value is not None else value
+         for key, value in row.items()}
+        for row in rows
+    ]
+
+
+# -----------------------------------------------------------
+# APP
+# -----------------------------------------------------------
+@asynccontextmanager
+async def lifespan(app):
+    app.state.scorer = ReviewScorer()
+    app.state.batcher = MicroBatcher(
+        app.state.scorer.score_batch, SERVICE_CONFIG["max_batch"], SERVICE_CONFIG["max_wait_ms"]
+    )
+    await app.state.batcher.start()
+    yield
+    await app.state.batcher.stop()
+
+
+app = FastAPI(title="Bank review scoring service", lifespan=lifespan)
+
+
+@app.get("/health")
+async def health():
+    batcher = app.state.batcher
+    topics = app.state.scorer.topics
+    return {
+        "status": "ok",
+        "topic_model_version": topics.version if topics is not None else None,
+        "batches": batcher.batches,
+        "avg_batch_size": batcher.items / batcher.batches if batcher.batches else 0.0,
+    }
+
+
+@app.post("/score", response_model=ScoredReview)
+async def score(review: Review):
+    return await app.state.batcher.submit(review)
+
+
+@app.post("/score/batch", response_model=List[ScoredReview])
+async def score_batch(batch: ReviewBatch):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        app.state.batcher.executor, app.state.scorer.score_batch, batch.reviews
+    )
+
+
+# plain def: FastAPI runs these in its thread pool, each on a pooled connection
+@app.get("/banks/aggregates")
+def all_bank_aggregates(since: Optional[datetime.date] = None, db=Depends(database)):
+    return query_aggregates(db, since=since)
+
+
+@app.get("/banks/{bank_code}/aggregates")
+def bank_aggregates(bank_code: str, since: Optional[datetime.date] = None, db=Depends(database)):
+    rows = query_aggregates(db, bank_code=bank_code, since=since)
+    if not rows:
+        raise HTTPException(status_code=404, detail=f"No reviews for bank {bank_code!r}")
+    return rows[0]
+
+
+def main():
+    import uvicorn
+
+    uvicorn.run(app, host=SERVICE_CONFIG["host"], port=SERVICE_CONFIG["port"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Chunked sinks for scraped reviews
+
+Rows are buffered in small chunks and appended to disk as they arrive, so
+memory stays flat during a crawl and everything fetched before a failure
+is already saved.
+
+- CsvSink:     append-mode CSV
+- JsonlSink:   one JSON object per line
+- ParquetSink: one Parquet row group per chunk (needs pyarrow)
+- StoreSink:   partitions of a RawReviewStore
+"""
+
+import os
+import json
+import threading
+
+import pandas as pd
+
+
+class ReviewSink:
+    """Base class: buffers rows and hands full chunks to _write_chunk"""
+
+    def __init__(self, chunk_size=1000):
+        self.chunk_size = chunk_size
+        self.rows_written = 0
+        self._buffer = []
+        # scraper worker threads share one sink
+        self._lock = threading.Lock()
+
+    def write(self, rows):
+        for row in rows:
+            with self._lock:
+                self._buffer.append(row)
+                if len(self._buffer) >= self.chunk_size:
+                    self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+        chunk, self._buffer = self._buffer, []
+        self._write_chunk(chunk)
+        self.rows_written += len(chunk)
+
+    def _write_chunk(self, rows):
+        raise NotImplementedError
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # flush on errors too, so partial results reach the disk
+        self.close()
+
+
+class CsvSink(ReviewSink):
+    def __init__(self, path, chunk_size=1000):
+        super().__init__(chunk_size)
+        self.path = path
+        self._columns = None
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _write_chunk(self, rows):
+        df = pd.DataFrame(rows)
+        if self._columns is None:
+            self._columns = list(df.columns)
+            df.to_csv(self.path, index=False)
+        else:
+            df.reindex(columns=self._columns).to_csv(self.path, mode="a", header=False, index=False)
+
+
+class JsonlSink(ReviewSink):
+    def __init__(self, path, chunk_size=1000):
+        super().__init__(chunk_size)
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _write_chunk(self, rows):
+        with open(self.path, "a", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+
+
+class ParquetSink(ReviewSink):
+    def __init__(self, path, chunk_size=1000):
+        super().__init__(chunk_size)
+        import pyarrow  # noqa: F401  (fail early if pyarrow is missing)
+
+        self.path = path
+        self._writer = None
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def _write_chunk(self, rows):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        df = pd.DataFrame(rows)
+        if self._writer is None:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            self._writer = pq.ParquetWriter(self.path, table.schema)
+        else:
+            table = pa.Table.from_pandas(
+                df.reindex(columns=self._writer.schema.names),
+                schema=self._writer.schema, preserve_index=False
+            )
+        self._writer.write_table(table)
+
+    def close(self):
+        super().close()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class StoreSink(ReviewSink):
+    """Appends chunks to a RawReviewStore without moving its watermarks"""
+
+    def __init__(self, store, chunk_size=1000):
+        super().__init__(chunk_size)
+        self.store = store
+
+    def _write_chunk(self, rows):
+        self.store.append(pd.DataFrame(rows), update_watermarks=False)
+
+
+SINKS = {
+    "csv": CsvSink,
+    "jsonl": JsonlSink,
+    "parquet": ParquetSink,
+}
+
+
+def open_sink(path, fmt="csv", chunk_size=1000):
+    """Create the file sink registered for `fmt`"""
+    try:
+        sink_cls = SINKS[fmt]
+    except KeyError:
+        raise ValueError(f"Unknown sink format '{fmt}', expected one of {sorted(SINKS)}")
+    return sink_cls(path, chunk_size=chunk_size)
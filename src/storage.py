@@ -0,0 +1,395 @@
+"""
+Columnar storage for intermediate datasets
+
+Stage outputs (processed reviews, sentiment results, per-review themes)
+are written as typed, compressed Parquet datasets partitioned by bank and
+month:
+
+    data/sentiment/sentiment_results.parquet/
+        bank_code=CBE/month=2025-11/part-0-0.parquet
+        ...
+
+bank_code comes back as a categorical and review_date as a date, so
+nothing is re-parsed on the next hop. Readers pick the columns and the
+bank/month partitions they need; files are memory-mapped.
+
+Stages that only changed a few partitions (see delta.py) can rewrite
+just those with write_dataset(..., partitions=...). That swap is
+journaled: if it is interrupted, the next writer of the dataset rolls it
+back to the previous version. Writers hold a lock file (<dataset>.lock)
+so only one of them touches a dataset at a time; readers never change
+the directory, and while a journal exists they read the previous version
+of the swapped partitions from the backup.
+
+Datasets are addressed by their CSV path (e.g. DATA_PATHS entries). With
+STORAGE_FORMAT=csv, or without pyarrow, that CSV file is used as before.
+When the configured format is missing on disk the other one is read.
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import shutil
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import pandas as pd
+
+from config import STORAGE_CONFIG
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pafs
+except ImportError:  # CSV only
+    pa = None
+
+PARTITION_COLUMNS = ["bank_code", "month"]
+
+
+def storage_format(fmt=None):
+    fmt = fmt or STORAGE_CONFIG["format"]
+    if fmt == "parquet" and pa is None:
+        return "csv"
+    return fmt
+
+
+def parquet_path(path):
+    """Dataset directory for a CSV path: x/name.csv -> x/name.parquet"""
+    return os.path.splitext(path)[0] + ".parquet"
+
+
+def csv_path(path):
+    return os.path.splitext(path)[0] + ".csv"
+
+
+def dataset_location(path, fmt=None):
+    """Where a dataset is written on disk in the given (default: configured) format"""
+    return parquet_path(path) if storage_format(fmt) == "parquet" else csv_path(path)
+
+
+def dataset_exists(path):
+    return os.path.isdir(parquet_path(path)) or os.path.exists(csv_path(path))
+
+
+# -----------------------------------------------------------
+# WRITE
+# -----------------------------------------------------------
+def month_key(df):
+    """The month partition value ("YYYY-MM", "unknown" without a date) of every row"""
+    if "review_date" not in df.columns:
+        return pd.Series("unknown", index=df.index)
+    dates = pd.to_datetime(df["review_date"], errors="coerce")
+    return dates.dt.strftime("%Y-%m").fillna("unknown")
+
+
+def partition_keys(df):
+    """Set of (bank_code, month) partitions the rows fall into"""
+    keys = pd.DataFrame({"bank_code": df["bank_code"].astype(str).to_numpy(),
+                         "month": month_key(df).to_numpy()})
+    return set(keys.drop_duplicates().itertuples(index=False, name=None))
+
+
+def _partition_dir(root, key):
+    return os.path.join(root, *(f"{column}={value}" for column, value in zip(PARTITION_COLUMNS, key)))
+
+
+def _to_table(df):
+    """Arrow table with typed columns and the month partition key"""
+    df = df.copy()
+    df["month"] = month_key(df)
+    if "review_date" in df.columns:
+        df["review_date"] = pd.to_datetime(df["review_date"], errors="coerce")
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if "review_date" in df.columns:
+        table = table.set_column(
+            table.schema.get_field_index("review_date"), "review_date",
+            table.column("review_date").cast(pa.date32())
+        )
+    return table
+
+
+def _conform(table, schema):
+    """Cast columns to the types already on disk (e.g. a chunk where a column is all null)"""
+    for field in schema:
+        i = table.schema.get_field_index(field.name)
+        if i >= 0 and table.schema.field(i).type != field.type:
+            table = table.set_column(i, field, table.column(i).cast(field.type))
+    return table
+
+
+def _lock(path):
+    """Block until this process holds the writer lock of the dataset at path"""
+    f = open(path + ".lock", "a+")
+    f.seek(0)
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_EX)
+    else:
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+    return f
+
+
+def _unlock(f):
+    f.seek(0)
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_UN)
+    else:
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    f.close()
+
+
+class DatasetWriter:
+    """
+    Write a dataset in one or more chunks, then commit() it in place of
+    the previous version. Until commit() the old dataset stays readable.
+    The writer lock is held from construction until commit() (or
+    release()); a writer that dies releases it with its process.
+    """
+
+    def __init__(self, path, fmt=None):
+        self.fmt = storage_format(fmt)
+        self.path = dataset_location(path, self.fmt)
+        self.tmp_path = self.path + ".tmp"
+        self.parts = 0
+        self.rows = 0
+        self.schema = None    # column types of the first part; later parts follow it
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.lock = _lock(self.path)
+        # under the lock a leftover journal can only be from a dead writer
+        recover_dataset(self.path)
+        self._remove(self.tmp_path)
+
+    def release(self):
+        if self.lock is not None:
+            _unlock(self.lock)
+            self.lock = None
+
+    @staticmethod
+    def _remove(path):
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def write(self, df):
+        if self.fmt == "parquet":
+            table = _to_table(df)
+            if self.schema is None:
+                self.schema = table.schema
+            else:
+                table = _conform(table, self.schema)
+            ds.write_dataset(
+                table,
+                self.tmp_path,
+                format="parquet",
+                partitioning=ds.partitioning(
+                    pa.schema([(c, pa.string()) for c in PARTITION_COLUMNS]), flavor="hive"
+                ),
+                basename_template=f"part-{self.parts}-{{i}}.parquet",
+                existing_data_behavior="overwrite_or_ignore",
+                file_options=ds.ParquetFileFormat().make_write_options(
+                    compression=STORAGE_CONFIG["compression"]
+                ),
+            )
+        else:
+            df.to_csv(self.tmp_path, mode="a", header=self.parts == 0, index=False)
+        self.parts += 1
+        self.rows += len(df)
+
+    def commit(self):
+        if self.parts == 0:
+            # an empty dataset still replaces the old one
+            if self.fmt == "parquet":
+                os.makedirs(self.tmp_path, exist_ok=True)
+            else:
+                open(self.tmp_path, "w").close()
+        self._remove(self.path)
+        os.replace(self.tmp_path, self.path)
+        self.release()
+        return self.path
+
+
+def _swap_paths(path):
+    """Journal and backup directory of a partition swap"""
+    return path + ".swap.json", path + ".bak"
+
+
+def _swap_partitions(path, tmp_path, partitions):
+    """
+    Replace the given partitions of the dataset at path with those staged
+    under tmp_path, all or nothing. The journal lists the partitions and
+    whether each existed before; old directories are moved to the backup
+    before new ones are moved in. Removing the journal commits the swap.
+    """
+    journal, backup = _swap_paths(path)
+    entries = [[*key, os.path.isdir(_partition_dir(path, key))] for key in sorted(partitions)]
+    with open(journal + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(entries, f)
+    os.replace(journal + ".tmp", journal)
+
+    for *key, existed in entries:
+        if existed:
+            saved = _partition_dir(backup, key)
+            os.makedirs(os.path.dirname(saved), exist_ok=True)
+            os.replace(_partition_dir(path, key), saved)
+    for *key, _ in entries:
+        new_dir = _partition_dir(tmp_path, key)
+        if os.path.isdir(new_dir):
+            current = _partition_dir(path, key)
+            os.makedirs(os.path.dirname(current), exist_ok=True)
+            os.replace(new_dir, current)
+
+    os.remove(journal)
+    DatasetWriter._remove(backup)
+
+
+def _read_journal(path):
+    """Entries of the partition swap in progress at path, None if there is none"""
+    journal, _ = _swap_paths(path)
+    try:
+        with open(journal, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def recover_dataset(path):
+    """
+    Roll back a partition swap that did not finish (no-op otherwise).
+    Only call this holding the writer lock (DatasetWriter does).
+    """
+    journal, backup = _swap_paths(path)
+    if os.path.exists(journal):
+        with open(journal, encoding="utf-8") as f:
+            entries = json.load(f)
+        for *key, existed in entries:
+            current, saved = _partition_dir(path, key), _partition_dir(backup, key)
+            if existed and not os.path.isdir(saved):
+                continue    # never moved out: still the old partition
+            DatasetWriter._remove(current)
+            if existed:
+                os.makedirs(os.path.dirname(current), exist_ok=True)
+                os.replace(saved, current)
+        os.remove(journal)
+    DatasetWriter._remove(backup)
+
+
+def write_dataset(df, path, fmt=None, partitions=None):
+    """
+    Write a whole DataFrame as a dataset; returns the path written.
+
+    With partitions (a set of (bank_code, month) keys) and an existing
+    Parquet dataset, only those partitions are rewritten from df's rows;
+    the others are left as they are on disk. CSV is always rewritten.
+    """
+    writer = DatasetWriter(path, fmt)
+    try:
+        if partitions is None or writer.fmt != "parquet" or not os.path.isdir(writer.path):
+            writer.write(df)
+            return writer.commit()
+
+        writer.schema = ds.dataset(writer.path, format="parquet").schema
+        if partitions:
+            keys = pd.MultiIndex.from_arrays([df["bank_code"].astype(str), month_key(df)])
+            writer.write(df[keys.isin(list(partitions))])
+        _swap_partitions(writer.path, writer.tmp_path, partitions)
+        writer._remove(writer.tmp_path)
+        return writer.path
+    finally:
+        writer.release()
+
+
+# -----------------------------------------------------------
+# READ
+# -----------------------------------------------------------
+def _open_parquet(path):
+    return ds.dataset(
+        path,
+        format="parquet",
+        partitioning=ds.HivePartitioning.discover(infer_dictionary=True),
+        filesystem=pafs.LocalFileSystem(use_mmap=True),
+    )
+
+
+def _key_filter(keys):
+    """Expression matching the given (bank_code, month) partitions"""
+    expression = ds.scalar(False)
+    for bank, month in keys:
+        expression = expression | ((ds.field("bank_code") == bank) & (ds.field("month") == month))
+    return expression
+
+
+def _read_parquet(path, columns, bank_codes, months):
+    expression = ds.scalar(True)
+    if bank_codes is not None:
+        expression = expression & ds.field("bank_code").isin(list(bank_codes))
+    if months is not None:
+        expression = expression & ds.field("month").isin(list(months))
+
+    while True:
+        entries = _read_journal(path)
+        dataset = _open_parquet(path)
+        if columns is None:
+            columns = [c for c in dataset.schema.names if c != "month"]
+        if entries is None:
+            table = dataset.to_table(columns=list(columns), filter=expression)
+            return table.to_pandas(date_as_object=False)
+
+        # a swap is in progress: the previous version of its partitions is
+        # the backup copy once moved there, the dataset's copy before that
+        _, backup = _swap_paths(path)
+        moved = [(bank, month) for bank, month, existed in entries
+                 if existed and os.path.isdir(_partition_dir(backup, (bank, month)))]
+        in_place = [(bank, month) for bank, month, existed in entries
+                    if existed and (bank, month) not in moved]
+        swapped = [(bank, month) for bank, month, _ in entries]
+        try:
+            tables = [dataset.to_table(columns=list(columns), filter=expression & (
+                ~_key_filter(swapped) | _key_filter(in_place)))]
+            if moved:
+                tables.append(_open_parquet(backup).to_table(
+                    columns=list(columns), filter=expression & _key_filter(moved)))
+        except OSError:
+            continue    # the writer moved files under us: look again
+        # retry if the swap committed, or an in-place partition was moved, meanwhile
+        if _read_journal(path) == entries and not any(
+            os.path.isdir(_partition_dir(backup, key)) for key in in_place
+        ):
+            table = pa.concat_tables(tables, promote_options="permissive")
+            return table.to_pandas(date_as_object=False)
+
+
+def _read_csv(path, columns, bank_codes, months):
+    df = pd.read_csv(path, usecols=columns)
+    if bank_codes is not None:
+        df = df[df["bank_code"].isin(list(bank_codes))]
+    if months is not None:
+        df = df[pd.to_datetime(df["review_date"]).dt.strftime("%Y-%m").isin(list(months))]
+    return df.reset_index(drop=True)
+
+
+def read_dataset(path, columns=None, bank_codes=None, months=None, fmt=None):
+    """
+    Read a dataset, optionally only some columns and some bank / month
+    ("YYYY-MM") partitions. Parquet partitions outside the filter are
+    never opened; the CSV fallback filters after reading.
+    """
+    fmt = storage_format(fmt)
+    parquet_dir, csv_file = parquet_path(path), csv_path(path)
+
+    use_parquet = pa is not None and os.path.isdir(parquet_dir) and (
+        fmt == "parquet" or not os.path.exists(csv_file)
+    )
+    if use_parquet:
+        return _read_parquet(parquet_dir, columns, bank_codes, months)
+    if os.path.exists(csv_file):
+        return _read_csv(csv_file, columns, bank_codes, months)
+    raise FileNotFoundError(f"No dataset at {parquet_dir} or {csv_file}")
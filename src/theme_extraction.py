@@ -1,165 +1,517 @@
-"""
-Theme Extraction Script (TF-IDF + LDA Topic Modeling)
-Task 2: Thematic Analysis
-
-This script:
-- Loads sentiment-scored reviews
-- Extracts keywords using TF-IDF
-- Performs LDA topic modeling (4 topics per bank)
-- Assigns rule-based themes
-- Saves results to data/themes/
-"""
-
-import os
-import sys
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer, CountVectorizer
-from sklearn.decomposition import LatentDirichletAllocation
-from config import DATA_PATHS
-
-
-class ThemeExtractor:
-    def __init__(self):
-        self.input_path = "data/sentiment/sentiment_results.csv"
-        self.output_path = "data/themes/themes_by_bank.csv"
-        self.lda_output_path = "data/themes/lda_topics_by_bank.csv"
-        self.df = None
-
-    # -----------------------------------------------------------
-    def load_data(self):
-        print("Loading sentiment-scored data...")
-        try:
-            self.df = pd.read_csv(self.input_path)
-            print(f"Loaded {len(self.df)} rows.")
-            return True
-        except Exception as e:
-            print(f"Error: {e}")
-            return False
-
-    # -----------------------------------------------------------
-    def extract_keywords_tfidf(self):
-        print("\nExtracting keywords using TF-IDF...")
-
-        vectorizer = TfidfVectorizer(
-            stop_words="english",
-            max_features=50,
-            ngram_range=(1, 2)
-        )
-
-        keywords_per_bank = []
-
-        for bank in self.df["bank_code"].unique():
-            bank_df = self.df[self.df["bank_code"] == bank]
-
-            tfidf_matrix = vectorizer.fit_transform(bank_df["review_text"])
-            features = vectorizer.get_feature_names_out()
-
-            keywords_per_bank.append({
-                "bank_code": bank,
-                "bank_name": bank_df["bank_name"].iloc[0],
-                "keywords": ", ".join(features)
-            })
-
-        self.keywords_df = pd.DataFrame(keywords_per_bank)
-        print("✓ TF-IDF extraction complete.")
-
-    # -----------------------------------------------------------
-    def lda_topic_modeling(self, num_topics=4, top_words=8):
-        print("\nPerforming LDA Topic Modeling (4 topics per bank)...")
-
-        lda_results = []
-
-        for bank in self.df["bank_code"].unique():
-            bank_df = self.df[self.df["bank_code"] == bank]
-
-            # Convert to bow (bag of words)
-            count_vectorizer = CountVectorizer(stop_words="english")
-            bow_matrix = count_vectorizer.fit_transform(bank_df["review_text"])
-            feature_names = count_vectorizer.get_feature_names_out()
-
-            # Run LDA
-            lda = LatentDirichletAllocation(
-                n_components=num_topics,
-                random_state=42,
-                learning_method="batch"
-            )
-            lda.fit(bow_matrix)
-
-            # Extract top words for each topic
-            for i, topic in enumerate(lda.components_):
-                top_indices = topic.argsort()[-top_words:]
-                topic_words = [feature_names[idx] for idx in reversed(top_indices)]
-
-                lda_results.append({
-                    "bank_code": bank,
-                    "bank_name": bank_df["bank_name"].iloc[0],
-                    "topic_number": i + 1,
-                    "topic_keywords": ", ".join(topic_words)
-                })
-
-        self.lda_df = pd.DataFrame(lda_results)
-        print("✓ LDA Topic Modeling complete.")
-
-    # -----------------------------------------------------------
-    def assign_themes(self):
-        print("\nAssigning rule-based themes...")
-
-        def map_themes(keyword_string):
-            words = keyword_string.lower()
-
-            themes = []
-
-            if any(k in words for k in ["login", "password", "account", "access", "verification"]):
-                themes.append("Account Access Issues")
-
-            if any(k in words for k in ["slow", "loading", "crash", "error", "fail", "not working"]):
-                themes.append("Performance & Reliability")
-
-            if any(k in words for k in ["ui", "interface", "design", "easy", "navigation"]):
-                themes.append("User Interface & Experience")
-
-            if any(k in words for k in ["support", "service", "help", "call"]):
-                themes.append("Customer Support")
-
-            if any(k in words for k in ["transfer", "transaction", "payment", "balance"]):
-                themes.append("Transactions & Payments")
-
-            if not themes:
-                themes.append("General Feedback")
-
-            return ", ".join(themes)
-
-        self.keywords_df["themes"] = self.keywords_df["keywords"].apply(map_themes)
-
-    # -----------------------------------------------------------
-    def save_results(self):
-        os.makedirs("data/themes", exist_ok=True)
-
-        self.keywords_df.to_csv(self.output_path, index=False)
-        self.lda_df.to_csv(self.lda_output_path, index=False)
-
-        print(f"\nTF-IDF themes saved to → {self.output_path}")
-        print(f"LDA topics saved to   → {self.lda_output_path}")
-
-    # -----------------------------------------------------------
-    def process(self):
-        if not self.load_data():
-            return
-
-        self.extract_keywords_tfidf()
-        self.lda_topic_modeling(num_topics=4)
-        self.assign_themes()
-        self.save_results()
-
-        print("\n✓ THEME EXTRACTION COMPLETED\n")
-
-
-def main():
-    extractor = ThemeExtractor()
-    extractor.process()
-
-
-if __name__ == "__main__":
-    main()
+"""
+Theme Extraction Script (TF-IDF + LDA Topic Modeling)
+Task 2: Thematic Analysis
+
+This script:
+- Loads sentiment-scored reviews
+- Extracts keywords using TF-IDF
+- Performs LDA topic modeling (4 topics per bank)
+- Assigns rule-based themes to every review (and to each bank's keywords)
+- Saves results to data/themes/
+
+With DELTA_MODE=1 only new and changed reviews are tagged; the theme
+counts are updated from the delta and the saved LDA models are updated
+with partial_fit. TF-IDF keywords are kept from the last full run.
+"""
+
+import os
+import re
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer, ENGLISH_STOP_WORDS
+from sklearn.decomposition import LatentDirichletAllocation
+from config import DATA_PATHS, THEME_CONFIG, THEME_LEXICON, DEFAULT_THEME
+from delta import RowDelta, text_hash
+from preprocessing import TEXT_DTYPE
+from storage import dataset_exists, partition_keys, read_dataset, write_dataset
+from token_store import TokenStore
+from topic_models import save_topic_models, load_topic_models, TopicInferencer
+
+# per-bank LDA workers come from a fork server (see sentiment_analysis):
+# this stage runs next to the DB load in a pipeline thread
+_MP_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else None
+)
+
+
+# -----------------------------------------------------------
+# PER-BANK LDA (module level so process pool workers can run it)
+# -----------------------------------------------------------
+def bank_bow(tokens):
+    """Bag of words (stop words removed) and its sorted feature names from a TokenStore"""
+    return tokens.without(ENGLISH_STOP_WORDS).count_matrix()
+
+
+def fit_bank_lda(bow_matrix, feature_names, num_topics=4, learning_method="batch",
+                 batch_size=128, max_iter=10, random_state=42):
+    """
+    Fit LDA on one bank's bag of words. Returns it with a CountVectorizer
+    fixed to the same vocabulary, to transform new reviews later.
+    """
+    count_vectorizer = CountVectorizer(stop_words="english", vocabulary=list(feature_names))
+    count_vectorizer.fit([])
+
+    lda = LatentDirichletAllocation(
+        n_components=num_topics,
+        random_state=random_state,
+        learning_method=learning_method,
+        batch_size=batch_size,
+        max_iter=max_iter,
+        # scales online updates; partial_fit later adds to the same corpus
+        total_samples=bow_matrix.shape[0]
+    )
+    lda.fit(bow_matrix)
+    return count_vectorizer, lda
+
+
+def _fit_bank_task(task):
+    bank, bow_matrix, feature_names, kwargs = task
+    return bank, fit_bank_lda(bow_matrix, feature_names, **kwargs)
+
+
+def top_topic_words(lda, feature_names, top_words=8):
+    """Top words of every topic, most probable first"""
+    return [
+        [feature_names[idx] for idx in reversed(topic.argsort()[-top_words:])]
+        for topic in lda.components_
+    ]
+
+
+# -----------------------------------------------------------
+# RULE-BASED THEMES
+# -----------------------------------------------------------
+def build_theme_patterns(lexicon=THEME_LEXICON):
+    """
+    One compiled-once regex per theme, e.g.
+    {"performance": r"(?i)\b(?:not\s+working|crash|...)(?:s|es|ed|ing)?\b", ...}.
+    Word boundaries stop "ui" from matching inside "quick".
+    """
+    patterns = {}
+    for name, theme in lexicon.items():
+        # longest first, so "not working" wins over a shorter keyword
+        keywords = sorted(theme["keywords"], key=len, reverse=True)
+        alternatives = "|".join(re.escape(k).replace(r"\ ", r"\s+") for k in keywords)
+        patterns[name] = rf"(?i)\b(?:{alternatives})(?:s|es|ed|ing)?\b"
+    return patterns
+
+
+def tag_themes(texts, lexicon=THEME_LEXICON):
+    """
+    Multi-hot theme matrix for a Series of texts: one boolean column per
+    theme (theme_<name>). Each theme is one vectorized str.contains pass,
+    which runs in pyarrow's regex engine for Arrow-backed strings.
+    """
+    texts = texts.fillna("").astype(TEXT_DTYPE)
+    return pd.DataFrame(
+        {
+            f"theme_{name}": texts.str.contains(pattern, regex=True).to_numpy(dtype=bool)
+            for name, pattern in build_theme_patterns(lexicon).items()
+        },
+        index=texts.index
+    )
+
+
+def theme_labels(multi_hot, lexicon=THEME_LEXICON):
+    """Comma-separated theme labels per row, DEFAULT_THEME when nothing matched"""
+    labels = pd.Series("", index=multi_hot.index)
+    for name, theme in lexicon.items():
+        hit = multi_hot[f"theme_{name}"]
+        labels = labels.where(~hit, labels + ", " + theme["label"])
+    labels = labels.str.removeprefix(", ")
+    return labels.where(labels != "", DEFAULT_THEME)
+
+
+class ThemeExtractor:
+    def __init__(self, n_jobs=None, learning_method=None, delta=None):
+        self.input_path = "data/sentiment/sentiment_results.csv"
+        self.output_path = "data/themes/themes_by_bank.csv"
+        self.lda_output_path = "data/themes/lda_topics_by_bank.csv"
+        self.review_themes_path = "data/themes/review_themes.csv"
+        self.theme_counts_path = "data/themes/theme_counts_by_bank.csv"
+        self.input_columns = ["review_id", "review_text", "review_date", "bank_code", "bank_name"]
+        self.df = None
+
+        self.n_jobs = n_jobs or THEME_CONFIG["n_jobs"]
+        self.learning_method = learning_method or THEME_CONFIG["lda_learning_method"]
+        self.models = {}    # bank_code -> (CountVectorizer, LatentDirichletAllocation)
+        self.bank_names = {}
+        self.model_dir = DATA_PATHS["topic_models"]
+        self.model_version = None
+        self.tokens_path = DATA_PATHS["review_tokens"]
+        self.tokens = None
+
+        self.delta = THEME_CONFIG["delta"] if delta is None else delta
+        self.partitions = None  # review theme partitions to rewrite, None = all
+        self.base_model_version = None
+
+    # -----------------------------------------------------------
+    def load_data(self):
+        print("Loading sentiment-scored data...")
+        try:
+            # only the columns themes need; Parquet skips the rest on disk
+            self.df = read_dataset(self.input_path, columns=self.input_columns)
+            print(f"Loaded {len(self.df)} rows.")
+            return True
+        except Exception as e:
+            print(f"Error: {e}")
+            return False
+
+    def get_tokens(self):
+        """
+        Token store for self.df: the one saved by preprocessing when it
+        holds the same reviews (in any order), otherwise tokenized here once.
+        """
+        if self.tokens is not None and self.tokens.matches(self.df["review_id"]):
+            return self.tokens
+
+        if os.path.exists(self.tokens_path):
+            tokens = TokenStore.load(self.tokens_path).align(self.df["review_id"])
+            if tokens is not None:
+                self.tokens = tokens
+                return self.tokens
+
+        print("Tokenizing reviews (no matching token store found)...")
+        self.tokens = TokenStore.from_texts(self.df["review_text"], self.df["review_id"])
+        return self.tokens
+
+    # -----------------------------------------------------------
+    def extract_keywords_tfidf(self, top_n=50):
+        """
+        One TF-IDF fit over all reviews, then per-bank term weights from a
+        (banks x reviews) indicator matrix times the TF-IDF matrix. Each
+        bank's keywords are its top_n terms by summed TF-IDF score.
+        """
+        print("\nExtracting keywords using TF-IDF...")
+
+        # same terms and weights as TfidfVectorizer(stop_words="english",
+        # ngram_range=(1, 2)), built from the shared token ids
+        counts, features = self.get_tokens().without(ENGLISH_STOP_WORDS).count_matrix((1, 2))
+        tfidf_matrix = TfidfTransformer().fit_transform(counts)
+
+        # groupby on the sparse matrix: row b of bank_weights sums bank b's reviews
+        # reviews without a bank_code (factorized to -1) belong to no bank
+        bank_codes, banks = pd.factorize(self.df["bank_code"])
+        rows = np.flatnonzero(bank_codes >= 0)
+        indicator = sparse.csr_matrix(
+            (np.ones(len(rows)), (bank_codes[rows], rows)),
+            shape=(len(banks), len(bank_codes))
+        )
+        bank_weights = (indicator @ tfidf_matrix).toarray()
+        bank_names = self.df.groupby("bank_code", sort=False)["bank_name"].first()
+
+        keywords_per_bank = []
+
+        for i, bank in enumerate(banks):
+            weights = bank_weights[i]
+            k = min(top_n, np.count_nonzero(weights))
+            top = np.argpartition(-weights, k - 1)[:k] if k else np.array([], dtype=int)
+            top = top[np.lexsort((features[top], -weights[top]))]
+
+            keywords_per_bank.append({
+                "bank_code": bank,
+                "bank_name": bank_names[bank],
+                "keywords": ", ".join(features[top])
+            })
+
+        self.keywords_df = pd.DataFrame(keywords_per_bank)
+        print("✓ TF-IDF extraction complete.")
+
+    # -----------------------------------------------------------
+    def lda_topic_modeling(self, num_topics=4, top_words=8):
+        print(f"\nPerforming LDA Topic Modeling ({num_topics} topics per bank, "
+              f"{self.learning_method}, {self.n_jobs} workers)...")
+
+        fit_kwargs = {
+            "num_topics": num_topics,
+            "learning_method": self.learning_method,
+            "batch_size": THEME_CONFIG["lda_batch_size"],
+            "max_iter": THEME_CONFIG["lda_max_iter"],
+        }
+        tokens = self.get_tokens()
+        bank_codes, banks = pd.factorize(self.df["bank_code"])
+        tasks = [
+            (bank, *bank_bow(tokens.subset(np.flatnonzero(bank_codes == i))), fit_kwargs)
+            for i, bank in enumerate(banks)
+        ]
+        self.bank_names.update(self.df.groupby("bank_code", sort=False)["bank_name"].first())
+
+        # banks are independent: fit them concurrently, one process each
+        if self.n_jobs > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.n_jobs, len(tasks)), mp_context=_MP_CONTEXT) as pool:
+                fitted = list(pool.map(_fit_bank_task, tasks))
+        else:
+            fitted = [_fit_bank_task(task) for task in tasks]
+
+        self.models = dict(fitted)
+        self.lda_df = self.topics_frame(top_words)
+        print("✓ LDA Topic Modeling complete.")
+
+    def update_lda(self, new_df, top_words=8):
+        """
+        Online update: fold new reviews into the fitted per-bank models with
+        partial_fit instead of refitting history. Words outside a bank's
+        fitted vocabulary are ignored; banks without a model get a new one.
+        """
+        print(f"\nUpdating LDA topics with {len(new_df)} new reviews...")
+
+        self.bank_names.update(new_df.groupby("bank_code", sort=False)["bank_name"].first())
+
+        for bank, bank_df in new_df.groupby("bank_code", sort=False):
+            texts = bank_df["review_text"].tolist()
+
+            if bank not in self.models:
+                num_topics = next(iter(self.models.values()))[1].n_components if self.models else 4
+                self.models[bank] = fit_bank_lda(
+                    *bank_bow(TokenStore.from_texts(texts)),
+                    num_topics=num_topics, learning_method="online",
+                    batch_size=THEME_CONFIG["lda_batch_size"], max_iter=THEME_CONFIG["lda_max_iter"]
+                )
+                continue
+
+            count_vectorizer, lda = self.models[bank]
+            bow_matrix = count_vectorizer.transform(texts)
+            lda.total_samples = lda.total_samples + bow_matrix.shape[0]
+            lda.partial_fit(bow_matrix)
+
+        self.lda_df = self.topics_frame(top_words)
+        print("✓ LDA topics updated.")
+
+    def topics_frame(self, top_words=8):
+        lda_results = []
+
+        for bank, (count_vectorizer, lda) in self.models.items():
+            feature_names = count_vectorizer.get_feature_names_out()
+
+            # Extract top words for each topic
+            for i, topic_words in enumerate(top_topic_words(lda, feature_names, top_words)):
+                lda_results.append({
+                    "bank_code": bank,
+                    "bank_name": self.bank_names.get(bank),
+                    "topic_number": i + 1,
+                    "topic_keywords": ", ".join(topic_words)
+                })
+
+        return pd.DataFrame(lda_results)
+
+    # -----------------------------------------------------------
+    def assign_themes(self):
+        print("\nAssigning rule-based themes...")
+
+        # bank level: themes found in each bank's TF-IDF keywords
+        keyword_hits = tag_themes(self.keywords_df["keywords"])
+        self.keywords_df["themes"] = theme_labels(keyword_hits)
+
+        # review level: multi-hot theme columns for every review
+        review_hits = tag_themes(self.df["review_text"])
+        self.review_themes_df = self.review_themes_frame(review_hits)
+
+        self.theme_counts_df = self.count_themes(self.review_themes_df)
+        print(f"✓ Tagged {len(self.df)} reviews, "
+              f"{review_hits.any(axis=1).mean():.1%} with at least one theme.")
+
+    def review_themes_frame(self, review_hits, hashes=None):
+        """Per-review output: ids, theme columns, labels and the text hash delta runs compare"""
+        review_themes_df = pd.concat(
+            [self.df[["review_id", "review_date", "bank_code", "bank_name"]], review_hits], axis=1
+        )
+        review_themes_df["themes"] = theme_labels(review_hits)
+        review_themes_df["text_hash"] = text_hash(self.df["review_text"]) if hashes is None else hashes
+        return review_themes_df
+
+    @staticmethod
+    def theme_count_table(review_themes_df):
+        """Reviews per theme (wide, one column per theme) and bank_reviews, per bank"""
+        theme_columns = [f"theme_{name}" for name in THEME_LEXICON]
+        grouped = review_themes_df.groupby(["bank_code", "bank_name"], sort=False)
+
+        counts = grouped[theme_columns].sum()
+        counts["theme_" + DEFAULT_THEME] = (~review_themes_df[theme_columns].any(axis=1)).groupby(
+            [review_themes_df["bank_code"], review_themes_df["bank_name"]], sort=False
+        ).sum()
+        counts["bank_reviews"] = grouped.size()
+        return counts
+
+    @staticmethod
+    def count_themes(review_themes_df=None, table=None):
+        """Reviews per bank and theme (long format), with the share of the bank's reviews"""
+        if table is None:
+            table = ThemeExtractor.theme_count_table(review_themes_df)
+
+        labels = {f"theme_{name}": theme["label"] for name, theme in THEME_LEXICON.items()}
+        labels["theme_" + DEFAULT_THEME] = DEFAULT_THEME
+
+        long = table.drop(columns="bank_reviews").rename(columns=labels).stack()
+        long = long.rename("review_count").reset_index().rename(columns={"level_2": "theme"})
+        long["bank_reviews"] = table["bank_reviews"].reindex(
+            pd.MultiIndex.from_frame(long[["bank_code", "bank_name"]])
+        ).to_numpy()
+        long["share"] = long["review_count"] / long["bank_reviews"]
+        return long
+
+    @staticmethod
+    def update_theme_counts(counts_df, removed, added):
+        """
+        Apply a delta to stored theme counts (long format): subtract the
+        stored versions of removed / changed reviews, add their new versions.
+        """
+        labels = {theme["label"]: f"theme_{name}" for name, theme in THEME_LEXICON.items()}
+        labels[DEFAULT_THEME] = "theme_" + DEFAULT_THEME
+        keys = ["bank_code", "bank_name"]
+
+        order = pd.MultiIndex.from_frame(counts_df[keys].drop_duplicates())
+        table = (
+            counts_df.pivot(index=keys, columns="theme", values="review_count")
+            .rename(columns=labels)[list(labels.values())]
+            .reindex(order)
+        )
+        table["bank_reviews"] = counts_df.groupby(keys, sort=False)["bank_reviews"].first()
+
+        for rows, sign in ((removed, -1), (added, 1)):
+            if len(rows):
+                change = ThemeExtractor.theme_count_table(rows)
+                change.index = change.index.set_levels(change.index.levels[0].astype(str), level=0)
+                table = table.add(sign * change, fill_value=0)
+
+        table = table.reindex(order.append(table.index.difference(order))).astype(int)
+        return ThemeExtractor.count_themes(table=table[table["bank_reviews"] > 0])
+
+    # -----------------------------------------------------------
+    # DELTA MODE
+    # -----------------------------------------------------------
+    def load_previous(self):
+        """
+        Review themes of the last run, with its keywords, counts and topic
+        models loaded; None when anything a delta run builds on is missing.
+        """
+        stored = [self.output_path, self.theme_counts_path]
+        if not dataset_exists(self.review_themes_path) or not all(map(os.path.exists, stored)):
+            return None
+        previous = read_dataset(self.review_themes_path)
+        counts_df = pd.read_csv(self.theme_counts_path)
+        theme_columns = {f"theme_{name}" for name in THEME_LEXICON}
+        if not theme_columns | {"text_hash"} <= set(previous.columns) or "bank_reviews" not in counts_df:
+            print("Stored themes are from another lexicon or version, tagging everything.")
+            return None
+        if not previous["review_id"].is_unique:
+            print("Stored themes have duplicate review_ids, tagging everything.")
+            return None
+        try:
+            self.models, manifest = load_topic_models(self.model_dir)
+        except FileNotFoundError:
+            return None
+
+        self.base_model_version = manifest["version"]
+        self.bank_names.update({bank: info["bank_name"] for bank, info in manifest["banks"].items()})
+        self.keywords_df = pd.read_csv(self.output_path)
+        self.theme_counts_df = counts_df
+        return previous
+
+    def process_delta(self, previous):
+        """Tag new and changed reviews, update counts and topic models from them"""
+        hashes = text_hash(self.df["review_text"])
+        delta = RowDelta(self.df["review_id"], hashes, previous["review_id"], previous["text_hash"])
+        print(f"\nDelta against stored themes: {delta.summary()}")
+
+        theme_columns = [f"theme_{name}" for name in THEME_LEXICON]
+        review_hits = pd.DataFrame(
+            previous[theme_columns].to_numpy(dtype=bool)[np.maximum(delta.source, 0)],
+            columns=theme_columns, index=self.df.index
+        )
+        pending = self.df[delta.pending]
+        if len(pending):
+            review_hits.loc[pending.index] = tag_themes(pending["review_text"]).to_numpy()
+        self.review_themes_df = self.review_themes_frame(review_hits, hashes)
+
+        # counts: take out the stored version of every changed / removed review, add the new one
+        changed = delta.changed(self.df, previous, ["review_date", "bank_code", "bank_name"])
+        replaced = changed & ~delta.new
+        old_rows = pd.concat([previous.iloc[delta.source[replaced]], previous[delta.removed]])
+        self.theme_counts_df = self.update_theme_counts(
+            self.theme_counts_df, removed=old_rows, added=self.review_themes_df[changed]
+        )
+        self.partitions = partition_keys(self.review_themes_df[changed]) | partition_keys(old_rows)
+
+        if len(pending):
+            self.update_lda(pending)
+        else:
+            self.lda_df = self.topics_frame()
+        print(f"✓ Tagged {len(pending)} reviews, {len(self.partitions)} partitions to update.")
+        return len(pending) > 0
+
+    # -----------------------------------------------------------
+    def save_results(self):
+        os.makedirs("data/themes", exist_ok=True)
+
+        self.keywords_df.to_csv(self.output_path, index=False)
+        self.lda_df.to_csv(self.lda_output_path, index=False)
+        review_themes_path = write_dataset(
+            self.review_themes_df, self.review_themes_path, partitions=self.partitions
+        )
+        self.theme_counts_df.to_csv(self.theme_counts_path, index=False)
+
+        print(f"\nTF-IDF themes saved to → {self.output_path}")
+        print(f"LDA topics saved to   → {self.lda_output_path}")
+        print(f"Review themes saved to → {review_themes_path}")
+        print(f"Theme counts saved to → {self.theme_counts_path}")
+
+    # -----------------------------------------------------------
+    def save_models(self):
+        """Persist the fitted per-bank models as a new artifact version"""
+        self.model_version = save_topic_models(
+            self.models,
+            self.model_dir,
+            bank_names=self.bank_names,
+            metadata={
+                "learning_method": self.learning_method,
+                "n_reviews": int(len(self.df)),
+                # set when the models were updated from a delta instead of refitted
+                "updated_from": self.base_model_version,
+            },
+        )
+        print(f"LDA models saved to   → {os.path.join(self.model_dir, self.model_version)}")
+
+    def infer_topics(self, df, version=None):
+        """
+        Topic distributions for new reviews from saved models (latest
+        version by default), without refitting.
+        """
+        inferencer = TopicInferencer(self.model_dir, version)
+        return inferencer.infer(df)
+
+    # -----------------------------------------------------------
+    def process(self):
+        if not self.load_data():
+            return
+
+        previous = self.load_previous() if self.delta else None
+        if previous is not None:
+            models_updated = self.process_delta(previous)
+            self.save_results()
+            if models_updated:
+                self.save_models()
+            print("\n✓ THEME EXTRACTION COMPLETED (delta)\n")
+            return
+
+        self.extract_keywords_tfidf()
+        self.lda_topic_modeling(num_topics=4)
+        self.assign_themes()
+        self.save_results()
+        self.save_models()
+
+        print("\n✓ THEME EXTRACTION COMPLETED\n")
+
+
+def main():
+    extractor = ThemeExtractor()
+    extractor.process()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""
+Shared tokenization store
+
+Reviews are tokenized once (lowercased, sklearn's default token pattern)
+and kept as CSR-style arrays instead of strings:
+
+    vocabulary   sorted object array of distinct tokens
+    offsets      int64, review i's tokens are ids[offsets[i]:offsets[i + 1]]
+    ids          int32 positions in vocabulary, in text order
+    review_ids   object array, the review each row belongs to
+
+On disk (.npz) the two string arrays are stored as UTF-8 bytes plus
+offsets, so no string is padded to the longest one. TokenStoreWriter
+builds a store chunk by chunk through spill files, without holding the
+chunks in memory.
+
+Later stages build count matrices, n-grams and word frequencies straight
+from these arrays instead of re-parsing review_text. The bag of words is
+the same as CountVectorizer / TfidfVectorizer would produce with the
+default analyzer.
+"""
+
+import os
+import shutil
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# sklearn's CountVectorizer default
+TOKEN_PATTERN = r"(?u)\b\w\w+\b"
+
+# ids remapped per block when a spilled store is committed
+REMAP_BLOCK = 1 << 22
+
+
+def _strings(values):
+    """values as an object array of str"""
+    return np.asarray(pd.Index(values, dtype=object).astype(str), dtype=object)
+
+
+def _pack(strings):
+    """Strings as (UTF-8 bytes, int64 offsets), string i is bytes[offsets[i]:offsets[i + 1]]"""
+    encoded = [value.encode("utf-8") for value in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)), out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _unpack(data, offsets):
+    blob = np.asarray(data, dtype=np.uint8).tobytes()
+    bounds = np.asarray(offsets).tolist()
+    return np.array([blob[a:b].decode("utf-8") for a, b in zip(bounds[:-1], bounds[1:])], dtype=object)
+
+
+class TokenStore:
+    """Token ids of many reviews in CSR layout, plus a sorted vocabulary"""
+
+    def __init__(self, vocabulary, offsets, ids, review_ids):
+        self.vocabulary = _strings(vocabulary)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.ids = np.asarray(ids, dtype=np.int32)
+        self.review_ids = _strings(review_ids)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    # -----------------------------------------------------------
+    # BUILD / MERGE / PERSIST
+    # -----------------------------------------------------------
+    @classmethod
+    def from_texts(cls, texts, review_ids=None):
+        texts = pd.Series(texts).fillna("").astype(str)
+        tokens = texts.str.lower().str.findall(TOKEN_PATTERN)
+
+        lengths = tokens.str.len().to_numpy(dtype=np.int64)
+        flat = np.fromiter(chain.from_iterable(tokens), dtype=object, count=int(lengths.sum()))
+        ids, vocabulary = pd.factorize(flat, sort=True)
+
+        offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        if review_ids is None:
+            review_ids = texts.index.astype(str)
+        return cls(vocabulary, offsets, ids, review_ids)
+
+    @classmethod
+    def concat(cls, stores):
+        """Merge in-memory stores into one vocabulary (see TokenStoreWriter for many chunks)"""
+        stores = list(stores)
+        if not stores:
+            return cls([], [0], [], [])
+
+        vocabulary = np.unique(np.concatenate([s.vocabulary for s in stores]))
+        ids, offsets, review_ids = [], [np.zeros(1, dtype=np.int64)], []
+        total = 0
+        for s in stores:
+            ids.append(np.searchsorted(vocabulary, s.vocabulary).astype(np.int32)[s.ids])
+            offsets.append(s.offsets[1:] + total)
+            review_ids.append(s.review_ids)
+            total += len(s.ids)
+
+        return cls(vocabulary, np.concatenate(offsets), np.concatenate(ids), np.concatenate(review_ids))
+
+    def save(self, path):
+        vocabulary_bytes, vocabulary_offsets = _pack(self.vocabulary)
+        review_id_bytes, review_id_offsets = _pack(self.review_ids)
+        np.savez(path, vocabulary_bytes=vocabulary_bytes, vocabulary_offsets=vocabulary_offsets,
+                 offsets=self.offsets, ids=self.ids,
+                 review_id_bytes=review_id_bytes, review_id_offsets=review_id_offsets)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            if "vocabulary" in data.files:   # fixed-width strings, older files
+                return cls(data["vocabulary"], data["offsets"], data["ids"], data["review_ids"])
+            return cls(_unpack(data["vocabulary_bytes"], data["vocabulary_offsets"]),
+                       data["offsets"], data["ids"],
+                       _unpack(data["review_id_bytes"], data["review_id_offsets"]))
+
+    def matches(self, review_ids):
+        """True when the store holds exactly these reviews, in this order"""
+        review_ids = _strings(review_ids)
+        return len(review_ids) == len(self) and bool(np.array_equal(review_ids, self.review_ids))
+
+    def align(self, review_ids):
+        """
+        Store reordered to the given review ids, or None when some are
+        missing (or the store's ids are not unique)
+        """
+        if self.matches(review_ids):
+            return self
+        index = pd.Index(self.review_ids)
+        if not index.is_unique:
+            return None
+        rows = index.get_indexer(_strings(review_ids))
+        if (rows < 0).any():
+            return None
+        return self.subset(rows)
+
+    # -----------------------------------------------------------
+    # VIEWS
+    # -----------------------------------------------------------
+    def doc_of_token(self):
+        return np.repeat(np.arange(len(self)), np.diff(self.offsets))
+
+    def subset(self, rows):
+        """Store restricted to the given row positions (vocabulary unchanged)"""
+        rows = np.asarray(rows)
+        lengths = np.diff(self.offsets)[rows]
+        starts = self.offsets[:-1][rows]
+        token_pos = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return TokenStore(self.vocabulary, offsets, self.ids[token_pos], self.review_ids[rows])
+
+    def without(self, stop_words):
+        """Store with the given words removed from every review"""
+        keep = ~np.isin(self.vocabulary, list(stop_words))
+        kept = keep[self.ids]
+        lengths = np.bincount(self.doc_of_token()[kept], minlength=len(self))
+        offsets = np.zeros(len(self) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return TokenStore(self.vocabulary, offsets, self.ids[kept], self.review_ids)
+
+    # -----------------------------------------------------------
+    # MATRICES
+    # -----------------------------------------------------------
+    def count_matrix(self, ngram_range=(1, 1)):
+        """
+        (reviews x terms) count matrix with terms sorted like sklearn's
+        get_feature_names_out(); only terms that occur are kept.
+        Returns (csr_matrix, feature_names).
+        """
+        doc = self.doc_of_token()
+        blocks, names = [], []
+
+        for n in range(ngram_range[0], ngram_range[1] + 1):
+            # n consecutive tokens of the same review, packed into one int64
+            # key (base len(vocabulary)); n = 1 is just the token ids
+            m = len(self.ids) - n + 1
+            if m <= 0:
+                continue
+            same_doc = doc[:m] == doc[n - 1:]
+            codes = np.zeros(m, dtype=np.int64)
+            for k in range(n):
+                codes = codes * len(self.vocabulary) + self.ids[k:k + m]
+            codes, gram_doc = codes[same_doc], doc[:m][same_doc]
+
+            columns, uniques = pd.factorize(codes, sort=True)
+            words = []
+            for _ in range(n):
+                words.append(self.vocabulary[uniques % len(self.vocabulary)])
+                uniques = uniques // len(self.vocabulary)
+            block_names = words[0] if n == 1 else np.array(
+                [" ".join(gram) for gram in zip(*reversed(words))], dtype=object
+            )
+
+            block = sparse.csr_matrix(
+                (np.ones(len(columns), dtype=np.int64), (gram_doc, columns)),
+                shape=(len(self), len(block_names))
+            )
+            blocks.append(block)
+            names.append(block_names)
+
+        if not blocks:
+            return sparse.csr_matrix((len(self), 0), dtype=np.int64), np.array([], dtype=object)
+
+        matrix = sparse.hstack(blocks, format="csr")
+        feature_names = np.concatenate(names)
+        order = np.argsort(feature_names, kind="stable")
+        matrix = matrix[:, order]
+        matrix.sort_indices()
+        return matrix, feature_names[order]
+
+    def frequencies(self):
+        """{token: count} over all reviews, e.g. for WordCloud.generate_from_frequencies"""
+        counts = np.bincount(self.ids, minlength=len(self.vocabulary))
+        present = counts > 0
+        return dict(zip(self.vocabulary[present].tolist(), counts[present].tolist()))
+
+
+class TokenStoreWriter:
+    """
+    Build the .npz of a TokenStore from many chunks (e.g. one per
+    preprocessing chunk) without keeping them in memory.
+
+    write() appends each chunk's token ids, review lengths and review ids
+    to spill files under <path>.spill/; only the vocabulary seen so far is
+    kept, in first-seen order. commit() sorts that vocabulary, remaps the
+    spilled ids to it block by block and streams the arrays into path.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.spill_dir = path + ".spill"
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+        os.makedirs(self.spill_dir)
+        self.files = {
+            name: open(os.path.join(self.spill_dir, name + ".bin"), "wb")
+            for name in ("ids", "lengths", "review_id_bytes", "review_id_lengths")
+        }
+        self.vocabulary = np.array([], dtype=object)
+        self.index = pd.Index(self.vocabulary)
+        self.reviews = 0
+        self.tokens = 0
+        self.review_id_size = 0
+
+    def write(self, store):
+        codes = self.index.get_indexer(store.vocabulary)
+        new = codes < 0
+        if new.any():
+            codes[new] = np.arange(len(self.vocabulary), len(self.vocabulary) + new.sum())
+            self.vocabulary = np.concatenate([self.vocabulary, store.vocabulary[new]])
+            self.index = pd.Index(self.vocabulary)
+
+        review_id_bytes, review_id_offsets = _pack(store.review_ids)
+        codes.astype(np.int32)[store.ids].tofile(self.files["ids"])
+        np.diff(store.offsets).tofile(self.files["lengths"])
+        review_id_bytes.tofile(self.files["review_id_bytes"])
+        np.diff(review_id_offsets).tofile(self.files["review_id_lengths"])
+        self.reviews += len(store)
+        self.tokens += len(store.ids)
+        self.review_id_size += len(review_id_bytes)
+
+    def _spilled(self, name, dtype, count, mode="r"):
+        if count == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(os.path.join(self.spill_dir, name + ".bin"), dtype=dtype, mode=mode, shape=(count,))
+
+    def _offsets(self, name, lengths):
+        offsets = np.memmap(os.path.join(self.spill_dir, name + ".bin"), dtype=np.int64,
+                            mode="w+", shape=(len(lengths) + 1,))
+        offsets[0] = 0
+        np.cumsum(lengths, out=offsets[1:])
+        return offsets
+
+    def commit(self):
+        """Write path; returns the number of reviews"""
+        for f in self.files.values():
+            f.close()
+
+        order = np.argsort(self.vocabulary, kind="stable")
+        rank = np.empty(len(order), dtype=np.int32)
+        rank[order] = np.arange(len(order), dtype=np.int32)
+        ids = self._spilled("ids", np.int32, self.tokens, mode="r+")
+        for start in range(0, self.tokens, REMAP_BLOCK):
+            ids[start:start + REMAP_BLOCK] = rank[ids[start:start + REMAP_BLOCK]]
+
+        vocabulary_bytes, vocabulary_offsets = _pack(self.vocabulary[order])
+        offsets = self._offsets("offsets", self._spilled("lengths", np.int64, self.reviews))
+        review_id_offsets = self._offsets(
+            "review_id_offsets", self._spilled("review_id_lengths", np.int64, self.reviews)
+        )
+        np.savez(self.path, vocabulary_bytes=vocabulary_bytes, vocabulary_offsets=vocabulary_offsets,
+                 offsets=offsets, ids=ids,
+                 review_id_bytes=self._spilled("review_id_bytes", np.uint8, self.review_id_size),
+                 review_id_offsets=review_id_offsets)
+
+        del ids, offsets, review_id_offsets
+        shutil.rmtree(self.spill_dir)
+        return self.reviews
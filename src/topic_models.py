@@ -0,0 +1,143 @@
+"""
+Versioned topic model artifacts
+
+Each theme extraction run saves its fitted per-bank CountVectorizer + LDA
+pairs under a new version directory:
+
+    models/topics/
+        LATEST                      <- name of the newest version
+        20250101-120000/
+            manifest.json           <- banks, topic count, sklearn version, ...
+            BOA.joblib              <- (CountVectorizer, LatentDirichletAllocation)
+            CBE.joblib
+            ...
+
+TopicInferencer loads one version once and assigns topic distributions
+to new reviews with transform(), no refitting.
+"""
+
+import os
+import json
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+
+LATEST_POINTER = "LATEST"
+MANIFEST = "manifest.json"
+
+
+def new_version():
+    return time.strftime("%Y%m%d-%H%M%S")
+
+
+def _create_version_dir(root):
+    """
+    Create the directory of a new timestamped version. Two saves within
+    the same second get a zero-padded counter suffix (20250101-120000-002,
+    ...), so versions still sort in creation order.
+    """
+    os.makedirs(root, exist_ok=True)
+    base = new_version()
+    version, n = base, 1
+    while True:
+        version_dir = os.path.join(root, version)
+        try:
+            os.mkdir(version_dir)
+            return version, version_dir
+        except FileExistsError:
+            n += 1
+            version = f"{base}-{n:03d}"
+
+
+def save_topic_models(models, root, bank_names=None, metadata=None, version=None):
+    """Write {bank_code: (vectorizer, lda)} as a new version and point LATEST at it"""
+    if version is None:
+        version, version_dir = _create_version_dir(root)
+    else:
+        version_dir = os.path.join(root, version)
+        os.makedirs(version_dir, exist_ok=False)
+
+    banks = {}
+    for bank, (count_vectorizer, lda) in models.items():
+        filename = f"{bank}.joblib"
+        joblib.dump((count_vectorizer, lda), os.path.join(version_dir, filename))
+        banks[bank] = {
+            "file": filename,
+            "bank_name": (bank_names or {}).get(bank),
+            "num_topics": int(lda.n_components),
+            "vocabulary_size": len(count_vectorizer.vocabulary_),
+        }
+
+    manifest = {
+        "version": version,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "sklearn_version": sklearn.__version__,
+        "banks": banks,
+        **(metadata or {}),
+    }
+    with open(os.path.join(version_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    # LATEST is only moved once the version is complete
+    tmp_path = os.path.join(root, LATEST_POINTER + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(root, LATEST_POINTER))
+
+    return version
+
+
+def latest_version(root):
+    with open(os.path.join(root, LATEST_POINTER), encoding="utf-8") as f:
+        return f.read().strip()
+
+
+def load_topic_models(root, version=None):
+    """Return ({bank_code: (vectorizer, lda)}, manifest) for a version (default: latest)"""
+    version = version or latest_version(root)
+    version_dir = os.path.join(root, version)
+
+    with open(os.path.join(version_dir, MANIFEST), encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    models = {
+        bank: joblib.load(os.path.join(version_dir, info["file"]))
+        for bank, info in manifest["banks"].items()
+    }
+    return models, manifest
+
+
+class TopicInferencer:
+    """Assign topic distributions to new reviews with saved per-bank models"""
+
+    def __init__(self, root, version=None):
+        self.models, self.manifest = load_topic_models(root, version)
+        self.version = self.manifest["version"]
+
+    def infer(self, df):
+        """
+        Per-review topic probabilities (topic_1..topic_k), dominant_topic
+        and topic_model_version. Reviews of banks without a model get NaN.
+        """
+        num_topics = max((lda.n_components for _, lda in self.models.values()), default=0)
+        topic_columns = [f"topic_{i + 1}" for i in range(num_topics)]
+        probs = np.full((len(df), num_topics), np.nan)
+
+        positions = pd.RangeIndex(len(df))
+        for bank, rows in positions.groupby(df["bank_code"].to_numpy()).items():
+            if bank not in self.models:
+                continue
+            count_vectorizer, lda = self.models[bank]
+            bow_matrix = count_vectorizer.transform(df["review_text"].iloc[rows].fillna("").tolist())
+            probs[rows, :lda.n_components] = lda.transform(bow_matrix)
+
+        result = pd.DataFrame(probs, columns=topic_columns, index=df.index)
+        has_model = ~np.isnan(probs).all(axis=1)
+        dominant = np.full(len(df), np.nan)
+        dominant[has_model] = np.nanargmax(probs[has_model], axis=1) + 1
+        result["dominant_topic"] = pd.array(dominant, dtype="Int64")
+        result["topic_model_version"] = self.version
+        return result
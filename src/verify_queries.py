@@ -1,31 +1,55 @@
-from sqlalchemy import text
-from db import engine
-
-def show(query, title):
-    print(f"\n=== {title} ===")
-    with engine.connect() as conn:
-        rows = conn.execute(text(query)).mappings().all()
-        for r in rows:
-            print(dict(r))
-
-show("SELECT COUNT(*) AS total_reviews FROM reviews;", "Total Reviews")
-
-show("""
-    SELECT b.bank_name, COUNT(*) AS total_reviews
-    FROM reviews r
-    JOIN banks b ON r.bank_id = b.bank_id
-    GROUP BY b.bank_name;
-""", "Reviews Per Bank")
-
-show("""
-    SELECT b.bank_name, AVG(r.rating) AS avg_rating
-    FROM reviews r
-    JOIN banks b ON r.bank_id = b.bank_id
-    GROUP BY b.bank_name;
-""", "Average Rating Per Bank")
-
-show("""
-    SELECT sentiment_label, COUNT(*) AS count
-    FROM reviews
-    GROUP BY sentiment_label;
-""", "Sentiment Distribution")
+import asyncio
+
+from db import run_queries, dispose_async_engine
+
+# Counts and averages come from the bank_daily_stats aggregates the loader
+# maintains, so these stay fast however large `reviews` grows. The queries
+# are independent and run concurrently, each on its own pooled connection.
+QUERIES = {
+    "Total Reviews": """
+        SELECT COALESCE(SUM(review_count), 0) AS total_reviews FROM bank_daily_stats;
+    """,
+
+    "Reviews Per Bank": """
+        SELECT b.bank_name, SUM(s.review_count) AS total_reviews
+        FROM bank_daily_stats s
+        JOIN banks b ON s.bank_id = b.bank_id
+        GROUP BY b.bank_name;
+    """,
+
+    "Average Rating Per Bank": """
+        SELECT b.bank_name,
+               CAST(SUM(s.rating_sum) AS FLOAT) / NULLIF(SUM(s.rating_count), 0) AS avg_rating
+        FROM bank_daily_stats s
+        JOIN banks b ON s.bank_id = b.bank_id
+        GROUP BY b.bank_name;
+    """,
+
+    "Sentiment Distribution": """
+        SELECT 'positive' AS sentiment_label, COALESCE(SUM(positive_count), 0) AS count FROM bank_daily_stats
+        UNION ALL
+        SELECT 'neutral', COALESCE(SUM(neutral_count), 0) FROM bank_daily_stats
+        UNION ALL
+        SELECT 'negative', COALESCE(SUM(negative_count), 0) FROM bank_daily_stats;
+    """,
+}
+
+
+def show(title, rows):
+    print(f"\n=== {title} ===")
+    for r in rows:
+        print(r)
+
+
+async def report():
+    try:
+        results = await run_queries(QUERIES)
+    finally:
+        await dispose_async_engine()
+
+    for title, rows in results.items():
+        show(title, rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(report())